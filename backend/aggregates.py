@@ -0,0 +1,143 @@
+from datetime import datetime
+from sqlalchemy import func
+from storage import db
+from models import MonthlyRollup, Transaction
+
+
+def totals_by_type():
+    """Sum of amounts per (lower-cased) transaction type, in one GROUP BY query"""
+    trans_type = func.lower(Transaction.type)
+    rows = db.session.query(trans_type, func.sum(Transaction.amount)) \
+        .group_by(trans_type) \
+        .all()
+    return {type_: total for type_, total in rows}
+
+
+def balance_summary():
+    """Income, expense and balance totals over all transactions"""
+    totals = totals_by_type()
+    income = totals.get("income", 0)
+    expense = totals.get("expense", 0)
+    return {
+        "income": income,
+        "expense": expense,
+        "balance": income - expense
+    }
+
+
+def parse_month(month_str):
+    """Parse 'YYYY-MM' into (year, month), raising ValueError if malformed"""
+    year, month = map(int, month_str.split("-"))
+    datetime(year, month, 1)  # validates the month number
+    return year, month
+
+
+def month_key(month_str):
+    """Normalize 'YYYY-M' or 'YYYY-MM' to 'YYYY-MM'; None passes through"""
+    if not month_str:
+        return None
+    year, month = parse_month(month_str)
+    return f"{year:04d}-{month:02d}"
+
+
+def month_range_filters(start=None, end=None):
+    """Timestamp filters for an inclusive 'YYYY-MM' start/end month range"""
+    filters = []
+    if start:
+        year, month = parse_month(start)
+        filters.append(Transaction.timestamp >= datetime(year, month, 1))
+    if end:
+        year, month = parse_month(end)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        filters.append(Transaction.timestamp < datetime(year, month, 1))
+    return filters
+
+
+def monthly_totals(start=None, end=None, user_id=None):
+    """Totals per year-month and type from one grouped query, as {month: {type: total}}"""
+    month = func.strftime("%Y-%m", Transaction.timestamp)
+    query = db.session.query(month, Transaction.type, func.sum(Transaction.amount)) \
+        .filter(*month_range_filters(start, end))
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id)
+    rows = query.group_by(month, Transaction.type).all()
+
+    totals = {}
+    for month_key, type_, total in rows:
+        if month_key is None:
+            continue
+        totals.setdefault(month_key, {})[type_] = total
+    return totals
+
+
+DASHBOARD_FIELDS = (
+    "balance",
+    "category_breakdown",
+    "monthly_income_expense",
+    "monthly_balance",
+    "current_month_summary"
+)
+
+
+def dashboard_data(fields=DASHBOARD_FIELDS, user_id=None, breakdown_type="expense", month=None):
+    """All dashboard widgets from a single grouped query over the rollup table.
+
+    Each widget has the same shape as its standalone endpoint. `month`
+    (YYYY-MM) picks the month summarized by current_month_summary and
+    defaults to the current month.
+    """
+    query = db.session.query(
+        MonthlyRollup.month,
+        MonthlyRollup.type,
+        MonthlyRollup.category,
+        func.sum(MonthlyRollup.total)
+    )
+    if user_id is not None:
+        query = query.filter(MonthlyRollup.user_id == user_id)
+    rows = query.group_by(MonthlyRollup.month, MonthlyRollup.type, MonthlyRollup.category).all()
+
+    month = month or datetime.now().strftime("%Y-%m")
+    type_totals = {}
+    category_totals = {}
+    monthly = {}
+    month_summary = {}
+
+    for month_key, type_, category, total in rows:
+        if type_:
+            type_totals[type_.lower()] = type_totals.get(type_.lower(), 0) + total
+        if type_ == breakdown_type:
+            category_totals[category or "Other"] = category_totals.get(category or "Other", 0) + total
+        by_type = monthly.setdefault(month_key, {})
+        by_type[type_] = by_type.get(type_, 0) + total
+        if month_key == month:
+            month_summary[category] = month_summary.get(category, 0) + total
+
+    data = {}
+    if "balance" in fields:
+        income = type_totals.get("income", 0)
+        expense = type_totals.get("expense", 0)
+        data["balance"] = {"income": income, "expense": expense, "balance": income - expense}
+    if "category_breakdown" in fields:
+        data["category_breakdown"] = category_totals
+    if "monthly_income_expense" in fields:
+        data["monthly_income_expense"] = [
+            {
+                "month": month_key,
+                "income": by_type.get("income", 0),
+                "expense": sum(total for type_, total in by_type.items() if type_ != "income")
+            }
+            for month_key, by_type in sorted(monthly.items())
+        ]
+    if "monthly_balance" in fields:
+        data["monthly_balance"] = [
+            {
+                "month": month_key,
+                "income": by_type.get("income", 0),
+                "expense": by_type.get("expense", 0),
+                "balance": by_type.get("income", 0) - by_type.get("expense", 0)
+            }
+            for month_key, by_type in sorted(monthly.items())
+        ]
+    if "current_month_summary" in fields:
+        data["current_month_summary"] = {"month": month, "summary": month_summary}
+    return data
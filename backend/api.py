@@ -1,42 +1,80 @@
-import joblib
 from models import User
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
-from flask import Flask, request, jsonify
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity, verify_jwt_in_request
+from flask import Blueprint, Flask, Response, current_app, request, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import extract, func
+from sqlalchemy import func
 from flask_cors import CORS
 from datetime import datetime
 from utils import categorize
+from keyword_matcher import KeywordMatcher
 from storage import db
+from importer import filter_duplicates, bulk_insert_transactions
+from jobs import JobQueue
+from aggregates import balance_summary, monthly_totals, month_key, dashboard_data, DASHBOARD_FIELDS
+from rollups import add_to_rollups
+from migrations import upgrade_schema
+from pagination import int_arg, paginate_newest_first
+import classifier
+import instrumentation
+import snapshots
+from response_cache import bump_data_version, cached_response
+from instrumentation import collect_timings, span, summarize, timed_iter
 from werkzeug.utils import secure_filename
 import os
 import uuid
-import pandas as pd
-import pdfplumber
+import codecs
+import csv
+import io
+import json
+from pdf_extract import iter_page_texts
+from statement_grammars import match_line
 import re
 import logging
 
+# pandas, numpy, pdfplumber and the classifier are imported on first use
+# (see classifier.warm_up), so importing this module stays cheap.
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-model = joblib.load('transaction_classifier.pkl')
-app = Flask(__name__)
-CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:3000"])
+jwt = JWTManager()
+bp = Blueprint('api', __name__)
+
+def create_app(config=None):
+    """Create the Flask app; `config` overrides the defaults (e.g. a test database)"""
+    app = Flask(__name__)
+    CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:3000"], expose_headers=["X-Next-Cursor"])
+
+    app.config['JWT_SECRET_KEY'] = 'your-secret-key'  # Use a strong secret in production!
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///data.db'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['UPLOAD_FOLDER'] = 'uploads'
+    app.config['MAX_CONTENT_LENGTH'] = 512 * 1024 * 1024  # 512MB max file size
+    app.config['STATEMENT_CHUNK_SIZE'] = 5000  # CSV rows parsed and committed per chunk
+    app.config['INSERT_BATCH_SIZE'] = 1000  # rows per executemany INSERT
+    app.config['IMPORT_WORKERS'] = 2  # background statement import threads
+    app.config['WARM_UP'] = os.environ.get('FINANCE_WARM_UP') == '1'  # preload model and parsers
+    app.config['PROFILE_REQUESTS'] = os.environ.get('FINANCE_PROFILE') == '1'  # honour ?profile=1
+    app.config['PROFILE_DIR'] = 'profiles'  # where per-request profiles are written
+    if config:
+        app.config.update(config)
+
+    # Create upload folder if it doesn't exist
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-app.config['JWT_SECRET_KEY'] = 'your-secret-key'  # Use a strong secret in production!
-jwt = JWTManager(app)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///data.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    db.init_app(app)
+    jwt.init_app(app)
+    app.register_blueprint(bp)
+    instrumentation.init_app(app)
+    app.extensions['job_queue'] = JobQueue(app, import_statement_file, max_workers=app.config['IMPORT_WORKERS'])
 
-# Create upload folder if it doesn't exist
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    if app.config['WARM_UP']:
+        classifier.warm_up()
 
-db.init_app(app)
+    return app
 
-from models import Transaction
+from models import Transaction, ImportJob, MonthlyRollup
 
 # Bank Statement Parser Class
 class BankStatementParser:
@@ -56,26 +94,46 @@ class BankStatementParser:
             'education': ['school', 'college', 'course', 'book', 'tuition'],
             'groceries': ['grocery', 'supermarket', 'vegetables', 'fruits', 'milk']
         }
+        self.keyword_matcher = KeywordMatcher(self.category_mapping)
+    
+    DATE_FORMATS = [
+        '%d/%m/%Y', '%m/%d/%Y', '%Y-%m-%d', '%d-%m-%Y',
+        '%d %b %Y', '%d %B %Y', '%b %d, %Y', '%B %d, %Y',
+        '%d/%m/%y', '%m/%d/%y', '%d-%m-%y'
+    ]
     
     def categorize_transaction(self, description):
         """Categorize transaction using ML model or keyword matching"""
-        if not description:
-            return 'other'
+        return self.categorize_transactions([description])[0]
+    
+    def categorize_transactions(self, descriptions):
+        """Categorize a batch of descriptions with a single model pass"""
+        categories = ['other'] * len(descriptions)
+        indices = [i for i, description in enumerate(descriptions) if description]
+        if not indices:
+            return categories
         
         try:
-            # First try using your existing ML model
-            predicted_category = model.predict([description])[0]
-            return predicted_category
-        except:
-            # Fallback to keyword matching
-            description_lower = description.lower()
-            for category, keywords in self.category_mapping.items():
-                if any(keyword in description_lower for keyword in keywords):
-                    return category
-            return 'other'
+            # Cached categories first, then one model pass for the rest
+            predicted = classifier.categorize([descriptions[i] for i in indices])
+        except Exception as e:
+            logger.warning(f"Batch ML prediction failed: {e}")
+            predicted = [None] * len(indices)
+        
+        for i, predicted_category in zip(indices, predicted):
+            # Fallback to keyword matching only for rows the model could not label
+            categories[i] = predicted_category or self.keyword_category(descriptions[i])
+        
+        return categories
+    
+    def keyword_category(self, description):
+        """Categorize transaction by keyword matching"""
+        return self.keyword_matcher.first_match(description, default='other')
     
     def clean_amount(self, amount_str):
         """Clean and convert amount string to float"""
+        import pandas as pd
+        
         if pd.isna(amount_str) or str(amount_str).strip() == '':
             return 0.0
         
@@ -93,17 +151,13 @@ class BankStatementParser:
     
     def parse_date(self, date_str):
         """Parse date string to datetime object"""
+        import pandas as pd
+        
         if pd.isna(date_str) or str(date_str).strip() == '':
             return None
         
         date_str = str(date_str).strip()
-        formats = [
-            '%d/%m/%Y', '%m/%d/%Y', '%Y-%m-%d', '%d-%m-%Y',
-            '%d %b %Y', '%d %B %Y', '%b %d, %Y', '%B %d, %Y',
-            '%d/%m/%y', '%m/%d/%y', '%d-%m-%y'
-        ]
-        
-        for fmt in formats:
+        for fmt in self.DATE_FORMATS:
             try:
                 return datetime.strptime(date_str, fmt)
             except ValueError:
@@ -111,6 +165,65 @@ class BankStatementParser:
         
         return None
     
+    def clean_amounts(self, values):
+        """Vectorized clean_amount over a whole column"""
+        import pandas as pd
+        
+        if pd.api.types.is_numeric_dtype(values):
+            return values.astype(float).fillna(0.0)
+        
+        cleaned = values.astype(str).str.replace(r'[₹$€£,\s]', '', regex=True)
+        
+        # Handle negative amounts in parentheses
+        negative = cleaned.str.contains('(', regex=False) & cleaned.str.contains(')', regex=False)
+        cleaned = cleaned.mask(
+            negative,
+            cleaned.str.replace('(', '-', regex=False).str.replace(')', '', regex=False)
+        )
+        
+        amounts = pd.to_numeric(cleaned, errors='coerce')
+        return amounts.where(values.notna(), 0.0).fillna(0.0)
+    
+    def detect_date_format(self, values, sample_size=200):
+        """Pick the date format that parses most of a sample of the column"""
+        import pandas as pd
+        
+        sample = values.dropna().astype(str).str.strip()
+        sample = sample[sample != ''].head(sample_size)
+        if sample.empty:
+            return None
+        
+        best_format, best_count = None, 0
+        for fmt in self.DATE_FORMATS:
+            parsed = pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum()
+            # Ties keep the earlier format, same as parse_date's ordering
+            if parsed > best_count:
+                best_format, best_count = fmt, parsed
+                if parsed == len(sample):
+                    break
+        
+        return best_format
+    
+    def parse_dates(self, values, date_format=None):
+        """Vectorized parse_date over a whole column"""
+        import pandas as pd
+        
+        text = values.where(values.notna(), '').astype(str).str.strip()
+        
+        if date_format:
+            dates = pd.to_datetime(text, format=date_format, errors='coerce')
+        else:
+            dates = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+        
+        # Rows in a different format than the rest of the file
+        leftover = dates.isna() & (text != '')
+        if leftover.any():
+            dates = dates.astype(object)
+            dates[leftover] = text[leftover].map(self.parse_date)
+            dates = pd.to_datetime(dates)
+        
+        return dates
+    
     def detect_csv_columns(self, df):
         """Detect column mappings from CSV headers"""
         columns = [col.lower().strip() for col in df.columns]
@@ -144,144 +257,181 @@ class BankStatementParser:
         
         return mapping
     
+    def apply_categories(self, transactions):
+        """Fill in 'category' for parsed transactions in one batch"""
+        with span('categorize'):
+            categories = self.categorize_transactions([t['description'] for t in transactions])
+        for transaction, category in zip(transactions, categories):
+            transaction['category'] = category
+    
+    def detect_encoding(self, file_path, block_size=1024 * 1024):
+        """Detect CSV encoding by streaming the file through a UTF-8 decoder"""
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(block_size), b''):
+                    decoder.decode(block)
+                decoder.decode(b'', final=True)
+            return 'utf-8'
+        except UnicodeDecodeError:
+            # latin-1 maps every byte, so it always decodes
+            return 'latin-1'
+    
     def parse_csv(self, file_path):
         """Parse CSV bank statement"""
         transactions = []
+        for chunk in self.iter_csv(file_path):
+            transactions.extend(chunk)
+        return transactions
+    
+    def iter_csv(self, file_path, chunksize=5000):
+        """Parse CSV bank statement in chunks, yielding a list of transactions per chunk"""
+        import pandas as pd
         
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'latin-1', 'cp1252']
-            df = None
+            encoding = self.detect_encoding(file_path)
+            column_mapping = None
+            date_format = None
             
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(file_path, encoding=encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if df is None or df.empty:
-                raise ValueError("Could not read CSV file")
-            
-            # Detect columns
-            column_mapping = self.detect_csv_columns(df)
-            
-            if not column_mapping.get('date') or not column_mapping.get('description'):
-                raise ValueError("Could not identify required columns")
-            
-            for _, row in df.iterrows():
-                try:
-                    # Parse date
-                    date_str = row.get(column_mapping['date'])
-                    transaction_date = self.parse_date(date_str)
-                    if not transaction_date:
-                        continue
-                    
-                    # Get description
-                    description = str(row.get(column_mapping['description'], '')).strip()
-                    if not description or description.lower() == 'nan':
-                        continue
-                    
-                    # Parse amounts
-                    if 'amount' in column_mapping:
-                        amount = self.clean_amount(row.get(column_mapping['amount']))
-                        trans_type = 'expense'  # Default
-                    else:
-                        debit = self.clean_amount(row.get(column_mapping.get('debit', ''), 0))
-                        credit = self.clean_amount(row.get(column_mapping.get('credit', ''), 0))
-                        
-                        if debit > 0:
-                            amount = debit
-                            trans_type = 'expense'
-                        elif credit > 0:
-                            amount = credit
-                            trans_type = 'income'
-                        else:
-                            continue
-                    
-                    if amount == 0:
-                        continue
+            for df in pd.read_csv(file_path, encoding=encoding, chunksize=chunksize):
+                if column_mapping is None:
+                    if df.empty:
+                        break
                     
-                    # Categorize
-                    category = self.categorize_transaction(description)
+                    # Detect columns and date format once, from the first chunk
+                    column_mapping = self.detect_csv_columns(df)
                     
-                    transactions.append({
-                        'description': description,
-                        'amount': amount,
-                        'timestamp': transaction_date,
-                        'type': trans_type,
-                        'category': category
-                    })
+                    if not column_mapping.get('date') or not column_mapping.get('description'):
+                        raise ValueError("Could not identify required columns")
                     
-                except Exception as e:
-                    logger.warning(f"Error processing CSV row: {e}")
-                    continue
+                    date_format = self.detect_date_format(df[column_mapping['date']])
+                
+                yield self.parse_csv_frame(df, column_mapping, date_format)
             
-            return transactions
+            if column_mapping is None:
+                raise ValueError("Could not read CSV file")
             
         except Exception as e:
             logger.error(f"CSV parsing error: {e}")
             raise
     
-    def parse_pdf(self, file_path):
-        """Parse PDF bank statement"""
+    def parse_csv_frame(self, df, column_mapping, date_format=None):
+        """Parse a statement DataFrame column-wise into transaction dicts.
+        
+        Each dict's 'row' is its data row in the file (1 = first row after the
+        header); read_csv keeps counting the index across chunks.
+        """
+        import numpy as np
+        import pandas as pd
+        
+        dates = self.parse_dates(df[column_mapping['date']], date_format)
+        
+        descriptions = df[column_mapping['description']]
+        descriptions = descriptions.where(descriptions.notna(), '').astype(str).str.strip()
+        
+        # Parse amounts
+        if 'amount' in column_mapping:
+            amounts = self.clean_amounts(df[column_mapping['amount']])
+            types = pd.Series('expense', index=df.index)  # Default
+            has_amount = pd.Series(True, index=df.index)
+        else:
+            zeros = pd.Series(0.0, index=df.index)
+            debit = self.clean_amounts(df[column_mapping['debit']]) if 'debit' in column_mapping else zeros
+            credit = self.clean_amounts(df[column_mapping['credit']]) if 'credit' in column_mapping else zeros
+            
+            amounts = debit.where(debit > 0, credit)
+            types = pd.Series(np.where(debit > 0, 'expense', 'income'), index=df.index)
+            has_amount = (debit > 0) | (credit > 0)
+        
+        keep = (
+            dates.notna()
+            & (descriptions != '')
+            & (descriptions.str.lower() != 'nan')
+            & has_amount
+            & (amounts != 0)
+        )
+        
+        transactions = [
+            {
+                'description': description,
+                'amount': amount,
+                'timestamp': timestamp,
+                'type': trans_type,
+                'row': row
+            }
+            for description, amount, timestamp, trans_type, row in zip(
+                descriptions[keep].tolist(),
+                amounts[keep].tolist(),
+                dates[keep].dt.to_pydatetime(),
+                types[keep].tolist(),
+                (df.index[keep.to_numpy()] + 1).tolist()
+            )
+        ]
+        
+        self.apply_categories(transactions)
+        return transactions
+    
+    def parse_pdf(self, file_path, stats=None):
+        """Parse PDF bank statement
+        
+        Each line is matched against the registered statement grammars in one
+        pass; the first grammar that matches wins. If `stats` is given it is
+        filled with match counts per grammar name plus 'unmatched'.
+        """
         transactions = []
+        if stats is None:
+            stats = {}
         
         try:
-            text = ""
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
+            has_text = False
+            line_number = 0  # across pages; reported as the 'row' of each transaction
             
-            if not text:
-                raise ValueError("Could not extract text from PDF")
-            
-            # Common transaction patterns
-            patterns = [
-                r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\s+(.+?)\s+(\d+[,.]?\d*\.?\d{2})\s*(dr|cr|debit|credit)',
-                r'(\d{1,2}\s+(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{4})\s+(.+?)\s+(\d+[,.]?\d*\.?\d{2})'
-            ]
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
+            # Pages are extracted across a process pool; match each page as it arrives
+            for page_text in iter_page_texts(file_path):
+                if not page_text:
+                    continue
+                has_text = True
                 
-                for match in matches:
+                for line in page_text.splitlines():
+                    line_number += 1
+                    grammar, match = match_line(line)
+                    if not grammar:
+                        stats['unmatched'] = stats.get('unmatched', 0) + 1
+                        continue
+                    stats[grammar.name] = stats.get(grammar.name, 0) + 1
+                    
                     try:
-                        date_str = match[0]
-                        description = match[1] if len(match) > 1 else "Transaction"
-                        amount_str = match[2] if len(match) > 2 else "0"
-                        
-                        date = self.parse_date(date_str)
+                        date = self.parse_date(match.group('date'))
                         if not date:
                             continue
                         
-                        amount = self.clean_amount(amount_str)
+                        amount = self.clean_amount(match.group('amount'))
                         if amount == 0:
                             continue
                         
                         # Determine type based on context
                         trans_type = 'expense'  # Default
-                        if len(match) > 3:
-                            type_indicator = match[3].lower()
-                            if 'cr' in type_indicator or 'credit' in type_indicator:
-                                trans_type = 'income'
-                        
-                        category = self.categorize_transaction(description)
+                        type_indicator = (match.groupdict().get('indicator') or '').lower()
+                        if 'cr' in type_indicator or 'credit' in type_indicator:
+                            trans_type = 'income'
                         
                         transactions.append({
-                            'description': description.strip(),
+                            'description': match.group('description').strip() or 'Transaction',
                             'amount': amount,
                             'timestamp': date,
                             'type': trans_type,
-                            'category': category
+                            'row': line_number
                         })
                         
                     except Exception as e:
                         logger.warning(f"Error parsing PDF transaction: {e}")
                         continue
             
+            if not has_text:
+                raise ValueError("Could not extract text from PDF")
+            
+            logger.info(f"PDF grammar matches: {stats}")
+            self.apply_categories(transactions)
             return transactions
             
         except Exception as e:
@@ -301,7 +451,7 @@ def allowed_file(filename):
 # -------------------------
 # POST /transactions: Add a new transaction - FIXED VERSION
 # -------------------------
-@app.route('/transactions', methods=['POST'])
+@bp.route('/transactions', methods=['POST'])
 def add_transaction():
     data = request.get_json()
     
@@ -374,7 +524,8 @@ def add_transaction():
 
     # Predict category using ML model
     try:
-        predicted_category = model.predict([description])[0]
+        with span('categorize'):
+            predicted_category = classifier.categorize([description])[0]
         logger.info(f"ML prediction successful: {predicted_category}")
     except Exception as e:
         logger.warning(f"ML prediction failed: {e}")
@@ -392,7 +543,14 @@ def add_transaction():
     
     try:
         db.session.add(transaction)
+        add_to_rollups([{
+            'timestamp': timestamp,
+            'type': trans_type,
+            'category': predicted_category,
+            'amount': amount
+        }])
         db.session.commit()
+        bump_data_version()
         
         logger.info(f"Transaction saved successfully: ID={transaction.id}")
         
@@ -417,7 +575,73 @@ def add_transaction():
 # -------------------------
 # Bank Statement Upload and Parsing
 # -------------------------
-@app.route('/upload-statement', methods=['POST'])
+def import_statement_file(file_path, user_id, progress=None):
+    """Parse a saved statement and store its transactions chunk by chunk.
+    
+    `progress`, if given, is called with the running totals after each chunk.
+    """
+    with collect_timings() as timings:
+        file_extension = file_path.rsplit('.', 1)[1].lower()
+        
+        if file_extension == 'csv':
+            # Stream CSVs chunk by chunk so memory stays flat for any file size
+            batches = timed_iter(
+                parser.iter_csv(file_path, chunksize=current_app.config['STATEMENT_CHUNK_SIZE']), 'parse'
+            )
+        elif file_extension == 'pdf':
+            pattern_stats = {}
+            with span('parse'):
+                batches = [parser.parse_pdf(file_path, stats=pattern_stats)]
+        else:
+            raise ValueError('Unsupported file type')
+        
+        result = {'total_parsed': 0, 'saved_count': 0, 'duplicate_count': 0, 'errors': []}
+        if file_extension == 'pdf':
+            result['pattern_stats'] = pattern_stats
+        
+        try:
+            for parsed_transactions in batches:
+                result['total_parsed'] += len(parsed_transactions)
+                
+                # Skip duplicates with one range query per chunk; earlier chunks
+                # are already committed, so repeats across chunks are caught too
+                with span('dedupe'):
+                    new_transactions, duplicates = filter_duplicates(parsed_transactions, user_id)
+                result['duplicate_count'] += duplicates
+                
+                with span('insert'):
+                    result['saved_count'] += bulk_insert_transactions(
+                        new_transactions,
+                        user_id=user_id,
+                        batch_size=current_app.config['INSERT_BATCH_SIZE'],
+                        errors=result['errors']
+                    )
+                bump_data_version()
+                
+                if progress:
+                    progress(result)
+        finally:
+            # Earlier chunks stay committed when a later one fails, so bring
+            # the user's analytics snapshot up to date with them either way
+            if snapshots.available() and result['saved_count']:
+                try:
+                    with span('snapshot'):
+                        snapshots.refresh_snapshot(user_id)
+                except Exception as e:
+                    logger.warning(f"Snapshot refresh failed for user {user_id}: {e}")
+    
+    # Stage times; 'parse' includes 'categorize', and 'db' is all SQL time
+    result['timings'] = summarize(timings)
+    logger.info(
+        "Import timings: " + ", ".join(f"{name}={t['seconds']:.3f}s" for name, t in result['timings'].items())
+    )
+    
+    stats = classifier.category_cache.stats()
+    logger.info(f"Category cache: {stats['hits']} hits, {stats['misses']} misses, {stats['size']} entries")
+    
+    return result
+
+@bp.route('/upload-statement', methods=['POST'])
 @jwt_required()
 def upload_statement():
     """Upload and parse bank statement"""
@@ -438,64 +662,34 @@ def upload_statement():
         # Save file securely
         filename = secure_filename(file.filename)
         unique_filename = f"{uuid.uuid4()}_{filename}"
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
+        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename)
         file.save(file_path)
         
+        # Queue the import and return at once unless the caller asks to wait
+        if request.args.get('sync', '').lower() not in ('1', 'true'):
+            job = current_app.extensions['job_queue'].submit(current_user, filename, file_path)
+            return jsonify({
+                'success': True,
+                'job_id': job.id,
+                'status': job.status,
+                'status_url': f'/jobs/{job.id}'
+            }), 202
+        
         try:
-            # Parse the statement
-            file_extension = filename.rsplit('.', 1)[1].lower()
-            
-            if file_extension == 'csv':
-                parsed_transactions = parser.parse_csv(file_path)
-            elif file_extension == 'pdf':
-                parsed_transactions = parser.parse_pdf(file_path)
-            else:
-                return jsonify({'error': 'Unsupported file type'}), 400
-            
-            # Save parsed transactions to database
-            saved_count = 0
-            errors = []
-            
-            for trans_data in parsed_transactions:
-                try:
-                    # Check for duplicates
-                    existing = Transaction.query.filter_by(
-                        description=trans_data['description'],
-                        amount=trans_data['amount'],
-                        timestamp=trans_data['timestamp'],
-                        user_id=current_user
-                    ).first()
-                    
-                    if existing:
-                        continue  # Skip duplicates
-                    
-                    transaction = Transaction(
-                        user_id=current_user,
-                        description=trans_data['description'],
-                        amount=trans_data['amount'],
-                        timestamp=trans_data['timestamp'],
-                        type=trans_data['type'],
-                        category=trans_data['category']
-                    )
-                    
-                    db.session.add(transaction)
-                    saved_count += 1
-                    
-                except Exception as e:
-                    errors.append(f"Error saving transaction: {str(e)}")
-                    continue
-            
-            db.session.commit()
+            result = import_statement_file(file_path, current_user)
             
             # Clean up uploaded file
             os.remove(file_path)
             
             return jsonify({
                 'success': True,
-                'message': f'Successfully processed {len(parsed_transactions)} transactions',
-                'saved_count': saved_count,
-                'total_parsed': len(parsed_transactions),
-                'errors': errors[:5]  # Return first 5 errors if any
+                'message': f"Successfully processed {result['total_parsed']} transactions",
+                'saved_count': result['saved_count'],
+                'duplicate_count': result['duplicate_count'],
+                'total_parsed': result['total_parsed'],
+                'errors': result['errors'][:5],  # Return first 5 errors if any
+                'pattern_stats': result.get('pattern_stats'),
+                'timings': result.get('timings')
             }), 200
             
         except Exception as parse_error:
@@ -513,10 +707,49 @@ def upload_statement():
         logger.error(f"Upload error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+# -------------------------
+# Prometheus metrics
+# -------------------------
+def classifier_metrics():
+    """Category cache and predictor counters for /metrics"""
+    cache_stats = classifier.category_cache.stats()
+    predictor_stats = classifier.predictor.stats()
+    return (
+        instrumentation.gauge_lines('classifier_cache_hits_total', 'Category cache hits', cache_stats['hits'], 'counter')
+        + instrumentation.gauge_lines('classifier_cache_misses_total', 'Category cache misses', cache_stats['misses'], 'counter')
+        + instrumentation.gauge_lines('classifier_cache_entries', 'Cached descriptions', cache_stats['size'])
+        + instrumentation.gauge_lines('classifier_predicted_rows_total', 'Rows run through the model', predictor_stats['rows'], 'counter')
+        + instrumentation.gauge_lines('classifier_predict_batches_total', 'Model calls', predictor_stats['batches'], 'counter')
+        + instrumentation.gauge_lines('classifier_predict_seconds_total', 'Time in model calls', predictor_stats['predict_seconds'], 'counter')
+        + instrumentation.gauge_lines('classifier_reloads_total', 'Model hot reloads', predictor_stats['reloads'], 'counter')
+    )
+
+instrumentation.register_collector(classifier_metrics)
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Request, SQL, span and classifier metrics in the Prometheus text format"""
+    return Response(instrumentation.render_metrics(), mimetype='text/plain; version=0.0.4')
+
+# -------------------------
+# Background import job status
+# -------------------------
+@bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    """Get progress of a statement import job"""
+    current_user = get_jwt_identity()
+    job = db.session.get(ImportJob, job_id)
+    
+    if job is None or job.user_id != current_user:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify(job.to_dict()), 200
+
 # -------------------------
 # Get parsing history
 # -------------------------
-@app.route('/parsing-history', methods=['GET'])
+@bp.route('/parsing-history', methods=['GET'])
 @jwt_required()
 def get_parsing_history():
     """Get user's statement parsing history"""
@@ -561,38 +794,48 @@ def get_parsing_history():
 # -------------------------
 # Smart transaction insights
 # -------------------------
-@app.route('/transaction-insights', methods=['GET'])
+@bp.route('/transaction-insights', methods=['GET'])
 @jwt_required()
 def get_transaction_insights():
     """Get ML-powered transaction insights"""
     try:
         current_user = get_jwt_identity()
-        transactions = Transaction.query.filter_by(user_id=current_user).all()
-        
-        if not transactions:
-            return jsonify({'message': 'No transactions found'}), 200
         
         # Category spending analysis
         category_spending = {}
         monthly_trends = {}
         
-        for trans in transactions:
-            # Category analysis
-            if trans.category not in category_spending:
-                category_spending[trans.category] = {'total': 0, 'count': 0, 'avg': 0}
+        table = snapshots.user_snapshot(current_user)
+        if table is not None:
+            # Vectorized group-bys over the user's columnar snapshot
+            for category, stats in snapshots.category_stats(table).items():
+                category_spending[category] = {'total': stats['total'], 'count': stats['count'], 'avg': 0}
             
-            category_spending[trans.category]['total'] += trans.amount
-            category_spending[trans.category]['count'] += 1
-            
-            # Monthly trends
-            month_key = trans.timestamp.strftime('%Y-%m')
-            if month_key not in monthly_trends:
-                monthly_trends[month_key] = {'income': 0, 'expense': 0}
-            
-            if trans.type == 'income':
-                monthly_trends[month_key]['income'] += trans.amount
-            else:
-                monthly_trends[month_key]['expense'] += trans.amount
+            for month, by_type in snapshots.monthly_totals(table).items():
+                monthly_trends[month] = {
+                    'income': by_type.get('income', 0),
+                    'expense': sum(total for type_, total in by_type.items() if type_ != 'income')
+                }
+        else:
+            for rollup in MonthlyRollup.query.filter_by(user_id=current_user):
+                # Category analysis
+                if rollup.category not in category_spending:
+                    category_spending[rollup.category] = {'total': 0, 'count': 0, 'avg': 0}
+                
+                category_spending[rollup.category]['total'] += rollup.total
+                category_spending[rollup.category]['count'] += rollup.count
+                
+                # Monthly trends
+                if rollup.month not in monthly_trends:
+                    monthly_trends[rollup.month] = {'income': 0, 'expense': 0}
+                
+                if rollup.type == 'income':
+                    monthly_trends[rollup.month]['income'] += rollup.total
+                else:
+                    monthly_trends[rollup.month]['expense'] += rollup.total
+        
+        if not category_spending:
+            return jsonify({'message': 'No transactions found'}), 200
         
         # Calculate averages
         for category in category_spending:
@@ -649,7 +892,7 @@ def get_transaction_insights():
 # -------------------------
 
 # register
-@app.route('/register', methods=['POST'])
+@bp.route('/register', methods=['POST'])
 def register():
     data = request.get_json()
     username = data.get('username')
@@ -669,18 +912,32 @@ def register():
     return jsonify({'message': 'User registered successfully'}), 201
 
 # transactions user
-@app.route('/transactions/user', methods=['GET'])
+@bp.route('/transactions/user', methods=['GET'])
 @jwt_required()
 def get_user_transactions():
     current_user = get_jwt_identity()
-    print(f"👤 Authenticated user ID: {current_user}")
+    logger.debug(f"Listing transactions for user {current_user}")
+
+    query = Transaction.query.filter_by(user_id=current_user)
+
+    # Without limit/cursor the whole history is returned, as before
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        return jsonify([t.to_dict() for t in query.all()]), 200
 
-    transactions = Transaction.query.filter_by(user_id=current_user).all()
+    try:
+        transactions, next_cursor = paginate_newest_first(
+            query, int_arg(request.args, 'limit', 50, minimum=1), request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    return jsonify([t.to_dict() for t in transactions]), 200
+    response = jsonify([t.to_dict() for t in transactions])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
 
 # login
-@app.route('/login', methods=['POST'])
+@bp.route('/login', methods=['POST'])
 def login():
     data = request.get_json()
     username = data.get('username')
@@ -694,77 +951,98 @@ def login():
     else:
         return jsonify({'error': 'Invalid credentials'}), 401
 
+def scoped_user_id():
+    """User id for ?scope=user requests (JWT required), None for all-users totals"""
+    if request.args.get('scope') != 'user':
+        return None
+    verify_jwt_in_request()
+    return get_jwt_identity()
+
+def monthly_totals_for_request():
+    """Monthly totals by type for this request's scope and start/end bounds"""
+    start = month_key(request.args.get('start'))
+    end = month_key(request.args.get('end'))
+    user_id = scoped_user_id()
+
+    table = snapshots.user_snapshot(user_id) if user_id is not None else None
+    if table is not None:
+        return snapshots.monthly_totals(table, start, end)
+    return monthly_totals(start, end, user_id)
+
 # category-breakdown
-@app.route('/category-breakdown')
+@bp.route('/category-breakdown')
+@cached_response
 def category_breakdown():
     txn_type = request.args.get("type", "expense")
-    transactions = Transaction.query.filter_by(type=txn_type).all()
+    user_id = scoped_user_id()
+
+    table = snapshots.user_snapshot(user_id) if user_id is not None else None
+    if table is not None:
+        results = snapshots.category_totals(table, txn_type).items()
+    else:
+        query = db.session.query(
+            MonthlyRollup.category,
+            func.sum(MonthlyRollup.total)
+        ).filter(MonthlyRollup.type == txn_type)
+        if user_id is not None:
+            query = query.filter(MonthlyRollup.user_id == user_id)
+        results = query.group_by(MonthlyRollup.category).all()
 
     category_totals = {}
-    for txn in transactions:
-        category = txn.category or "Other"
-        category_totals[category] = category_totals.get(category, 0) + txn.amount
+    for category, total in results:
+        category = category or "Other"
+        category_totals[category] = category_totals.get(category, 0) + total
 
     return jsonify(category_totals)
 
 # GET /monthly-balance savings
-@app.route('/monthly-balance')
+@bp.route('/monthly-balance')
+@cached_response
 def monthly_balance():
-    transactions = Transaction.query.all()
-
-    monthly_data = {}
-    for txn in transactions:
-        month = txn.timestamp.strftime("%Y-%m")
-        if month not in monthly_data:
-            monthly_data[month] = {"income": 0, "expense": 0}
-        if txn.type == 'income':
-            monthly_data[month]["income"] += txn.amount
-        elif txn.type == 'expense':
-            monthly_data[month]["expense"] += txn.amount
+    try:
+        totals = monthly_totals_for_request()
+    except ValueError:
+        return jsonify({"error": "Invalid month format. Use YYYY-MM"}), 400
 
     result = []
-    for month in sorted(monthly_data):
-        data = monthly_data[month]
-        balance = data["income"] - data["expense"]
+    for month in sorted(totals):
+        income = totals[month].get("income", 0)
+        expense = totals[month].get("expense", 0)
         result.append({
             "month": month,
-            "income": data["income"],
-            "expense": data["expense"],
-            "balance": balance
+            "income": income,
+            "expense": expense,
+            "balance": income - expense
         })
 
     return jsonify(result)
 
 # monthly-income-expense
-@app.route('/monthly-income-expense')
+@bp.route('/monthly-income-expense')
+@cached_response
 def monthly_income_expense():
-    transactions = Transaction.query.all()
-
-    monthly_data = {}
-    for txn in transactions:
-        month = txn.timestamp.strftime("%Y-%m")
-        if month not in monthly_data:
-            monthly_data[month] = {"income": 0, "expense": 0}
-        if txn.type == 'income':
-            monthly_data[month]["income"] += txn.amount
-        else:
-            monthly_data[month]["expense"] += txn.amount
+    try:
+        totals = monthly_totals_for_request()
+    except ValueError:
+        return jsonify({"error": "Invalid month format. Use YYYY-MM"}), 400
 
+    # Anything that is not income counts as expense here
     result = [
-        {"month": month, **data}
-        for month, data in sorted(monthly_data.items())
+        {
+            "month": month,
+            "income": by_type.get("income", 0),
+            "expense": sum(total for type_, total in by_type.items() if type_ != "income")
+        }
+        for month, by_type in sorted(totals.items())
     ]
     return jsonify(result)
 
-# GET /transactions
-@app.route('/transactions', methods=['GET'])
-def get_transactions():
-    query = Transaction.query
-
-    start = request.args.get('start')
-    end = request.args.get('end')
-    category = request.args.get('category')
-    type_ = request.args.get('type')
+def apply_transaction_filters(query, args):
+    """Apply the start/end/category/type filters shared by listing and export"""
+    start = args.get('start')
+    end = args.get('end')
+    category = args.get('category')
+    type_ = args.get('type')
 
     if start:
         start_date = datetime.strptime(start, "%Y-%m-%d")
@@ -777,11 +1055,21 @@ def get_transactions():
     if type_:
         query = query.filter_by(type=type_)
 
-    limit = int(request.args.get('limit', 10))
-    offset = int(request.args.get('offset', 0))
-    query = query.order_by(Transaction.timestamp.desc()).limit(limit).offset(offset)
+    return query
+
+# GET /transactions
+@bp.route('/transactions', methods=['GET'])
+def get_transactions():
+    query = apply_transaction_filters(Transaction.query, request.args)
 
-    transactions = query.all()
+    try:
+        limit = int_arg(request.args, 'limit', 10, minimum=1)
+        offset = int_arg(request.args, 'offset', 0, minimum=0)  # prefer cursor for deep pages
+        transactions, next_cursor = paginate_newest_first(
+            query, limit, request.args.get('cursor'), offset
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     result = [
         {
@@ -795,25 +1083,76 @@ def get_transactions():
         for t in transactions
     ]
 
-    return jsonify(result)
+    response = jsonify(result)
+    if next_cursor:
+        # Pass back as ?cursor= to fetch the next page
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
-# GET /summary
-@app.route('/summary', methods=['GET'])
-def get_summary():
-    transactions = Transaction.query.all()
+# GET /transactions/export
+EXPORT_FIELDS = ["id", "amount", "category", "description", "type", "timestamp"]
+EXPORT_CHUNK_ROWS = 1000
 
-    income = sum(t.amount for t in transactions if t.type.lower() == "income")
-    expense = sum(t.amount for t in transactions if t.type.lower() == "expense")
-    balance = income - expense
+@bp.route('/transactions/export', methods=['GET'])
+@jwt_required()
+def export_transactions():
+    """Stream the user's transactions as NDJSON or CSV"""
+    current_user = get_jwt_identity()
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'error': 'Format must be "ndjson" or "csv"'}), 400
 
-    return jsonify({
-        "income": income,
-        "expense": expense,
-        "balance": balance
-    })
+    try:
+        query = apply_transaction_filters(Transaction.query.filter_by(user_id=current_user), request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+    # Plain column rows fetched in batches from an open cursor keep memory bounded
+    rows = query.with_entities(*(getattr(Transaction, field) for field in EXPORT_FIELDS)) \
+        .order_by(Transaction.timestamp, Transaction.id) \
+        .yield_per(EXPORT_CHUNK_ROWS)
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == 'csv':
+            writer.writerow(EXPORT_FIELDS)
+
+        for count, row in enumerate(rows, 1):
+            record = dict(zip(EXPORT_FIELDS, row))
+            record['timestamp'] = record['timestamp'].isoformat() if record['timestamp'] else None
+            if export_format == 'csv':
+                writer.writerow(record.values())
+            else:
+                buffer.write(json.dumps(record) + "\n")
+
+            if count % EXPORT_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue()
+
+    if export_format == 'csv':
+        mimetype, filename = 'text/csv', 'transactions.csv'
+    else:
+        mimetype, filename = 'application/x-ndjson', 'transactions.ndjson'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+# GET /summary
+@bp.route('/summary', methods=['GET'])
+@cached_response
+def get_summary():
+    return jsonify(balance_summary())
 
 # GET /monthly-summary
-@app.route("/monthly-summary", methods=["GET"])
+@bp.route("/monthly-summary", methods=["GET"])
+@cached_response
 def get_monthly_summary():
     month_str = request.args.get("month")
     if not month_str:
@@ -824,13 +1163,21 @@ def get_monthly_summary():
     except:
         return jsonify({"error": "Invalid month format. Use YYYY-MM"}), 400
 
-    results = db.session.query(
-        Transaction.category,
-        func.sum(Transaction.amount)
-    ).filter(
-        extract("year", Transaction.timestamp) == year,
-        extract("month", Transaction.timestamp) == month
-    ).group_by(Transaction.category).all()
+    user_id = scoped_user_id()
+
+    table = snapshots.user_snapshot(user_id) if user_id is not None else None
+    if table is not None:
+        results = snapshots.category_totals(table, month=f"{year:04d}-{month:02d}").items()
+    else:
+        query = db.session.query(
+            MonthlyRollup.category,
+            func.sum(MonthlyRollup.total)
+        ).filter(
+            MonthlyRollup.month == f"{year:04d}-{month:02d}"
+        )
+        if user_id is not None:
+            query = query.filter(MonthlyRollup.user_id == user_id)
+        results = query.group_by(MonthlyRollup.category).all()
 
     summary = {category: float(total) for category, total in results}
 
@@ -840,43 +1187,58 @@ def get_monthly_summary():
     })
 
 # GET /monthly-summary-category
-@app.route('/summary-by-category')
+@bp.route('/summary-by-category')
+@cached_response
 def summary_by_category():
     summary_data = db.session.query(
-        extract('year', Transaction.timestamp).label('year'),
-        extract('month', Transaction.timestamp).label('month'),
-        Transaction.category,
-        func.sum(Transaction.amount)
-    ).filter(Transaction.type == 'expense') \
-     .group_by('year', 'month', Transaction.category) \
+        MonthlyRollup.month,
+        MonthlyRollup.category,
+        func.sum(MonthlyRollup.total)
+    ).filter(MonthlyRollup.type == 'expense') \
+     .group_by(MonthlyRollup.month, MonthlyRollup.category) \
      .all()
 
     summary = {}
-    for year, month, category, total in summary_data:
-        key = f"{int(year):04d}-{int(month):02d}"
+    for key, category, total in summary_data:
         if key not in summary:
             summary[key] = {}
         summary[key][category] = float(total)
 
     return jsonify(summary)
 
-# GET /balance
-@app.route('/balance')
-def get_balance():
-    transactions = Transaction.query.all()
+# GET /dashboard
+@bp.route('/dashboard')
+@cached_response
+def get_dashboard():
+    """Every dashboard widget in one response; pick widgets with ?fields=a,b"""
+    fields = request.args.get('fields')
+    fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else DASHBOARD_FIELDS
+    unknown = set(fields) - set(DASHBOARD_FIELDS)
+    if unknown:
+        return jsonify({"error": f"Unknown fields: {', '.join(sorted(unknown))}"}), 400
+
+    try:
+        month = month_key(request.args.get('month'))
+    except ValueError:
+        return jsonify({"error": "Invalid month format. Use YYYY-MM"}), 400
 
-    income = sum(t.amount for t in transactions if t.type.lower() == "income")
-    expense = sum(t.amount for t in transactions if t.type.lower() == "expense")
-    balance = income - expense
+    return jsonify(dashboard_data(
+        fields,
+        user_id=scoped_user_id(),
+        breakdown_type=request.args.get('type', 'expense'),
+        month=month
+    ))
 
-    return {
-        "income": income,
-        "expense": expense,
-        "balance": balance
-    }
+# GET /balance
+@bp.route('/balance')
+@cached_response
+def get_balance():
+    return balance_summary()
 
 # Run the app
 if __name__ == "__main__":
+    app = create_app()
     with app.app_context():
-        db.create_all()
+        upgrade_schema()
+    app.extensions['job_queue'].resume()
     app.run(debug=True)
\ No newline at end of file
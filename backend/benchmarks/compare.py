@@ -0,0 +1,65 @@
+"""Compare two benchmark result files from run.py.
+
+    python benchmarks/compare.py base.json head.json --threshold 0.10 --fail-on-regression
+
+Benchmarks are matched by suite, name and row count. A benchmark that got
+slower by more than the threshold is a regression.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        report = json.load(f)
+    results = {(r['suite'], r['name'], r['rows']): r for r in report['results']}
+    return report['meta'], results
+
+
+def label(meta):
+    commit = (meta.get('commit') or 'unknown')[:10]
+    return f"{commit}{' (dirty)' if meta.get('dirty') else ''}"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    arg_parser.add_argument('base')
+    arg_parser.add_argument('head')
+    arg_parser.add_argument('--threshold', type=float, default=0.10,
+                            help='relative slowdown that counts as a regression (default 0.10)')
+    arg_parser.add_argument('--fail-on-regression', action='store_true',
+                            help='exit with status 1 if anything regressed')
+    args = arg_parser.parse_args()
+
+    base_meta, base = load(args.base)
+    head_meta, head = load(args.head)
+    print(f"base {label(base_meta)}  vs  head {label(head_meta)}")
+    print(f"{'benchmark':<60} {'rows':>10} {'base ms':>12} {'head ms':>12} {'change':>9}")
+
+    regressions = []
+    for key in sorted(set(base) | set(head), key=lambda k: (k[2], k[0], k[1])):
+        suite, name, rows = key
+        title = f"{suite}: {name}"
+        if key not in base or key not in head:
+            side = 'head' if key in head else 'base'
+            print(f"{title:<60} {rows:>10} {'only in ' + side:>35}")
+            continue
+
+        old, new = base[key]['seconds'], head[key]['seconds']
+        change = (new - old) / old if old else 0.0
+        flag = ''
+        if change > args.threshold:
+            flag = '  REGRESSION'
+            regressions.append(key)
+        elif change < -args.threshold:
+            flag = '  faster'
+        print(f"{title:<60} {rows:>10} {old * 1000:>12.3f} {new * 1000:>12.3f} {change:>+8.1%}{flag}")
+
+    print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
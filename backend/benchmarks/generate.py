@@ -0,0 +1,173 @@
+"""Synthetic bank statements and transactions for benchmarks.
+
+Everything is generated from a seed, so the same arguments always give the
+same data. Rows are streamed to disk, so 10M-row fixtures need no more
+memory than 10k-row ones.
+
+    python benchmarks/generate.py csv statement.csv --rows 1000000
+    python benchmarks/generate.py pdf statement.pdf --rows 20000
+"""
+import argparse
+import csv
+import random
+from datetime import date, datetime, timedelta
+
+# (narration template, category, type, typical amount); {ref} and {month}
+# vary per row the way real reference numbers and salary months do
+NARRATIONS = [
+    ('UPI/{ref}/SWIGGY BANGALORE', 'Groceries', 'expense', 450),
+    ('UPI/{ref}/ZOMATO ORDER', 'Groceries', 'expense', 380),
+    ('POS {ref} BIGBASKET GROCERY', 'Groceries', 'expense', 1800),
+    ('POS {ref} AMAZON RETAIL', 'Shopping', 'expense', 2200),
+    ('UPI/{ref}/FLIPKART INTERNET', 'Shopping', 'expense', 1500),
+    ('UBER TRIP {ref}', 'Transport', 'expense', 320),
+    ('OLA CABS {ref}', 'Transport', 'expense', 280),
+    ('HP PETROL PUMP {ref}', 'Transport', 'expense', 2500),
+    ('ELECTRICITY BILL {ref} BESCOM', 'Utilities', 'expense', 1900),
+    ('AIRTEL BROADBAND {ref}', 'Utilities', 'expense', 999),
+    ('RENT {month} HOUSE OWNER', 'Rent', 'expense', 25000),
+    ('NEFT SALARY {month} ACME CORP', 'Salary', 'income', 85000),
+    ('IMPS {ref} REFUND', 'Others', 'income', 600),
+    ('ATM WDL {ref}', 'Others', 'expense', 3000),
+    ('SIP {ref} MUTUAL FUND', 'Others', 'expense', 5000),
+]
+
+START_DATE = date(2023, 1, 1)
+DAYS = 730
+
+
+def rows(count, seed=0):
+    """Yield (date, description, amount, type, category) tuples"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        template, category, txn_type, typical = rng.choice(NARRATIONS)
+        day = START_DATE + timedelta(days=rng.randrange(DAYS))
+        description = template.format(ref=rng.randrange(10 ** 9, 10 ** 10), month=day.strftime('%b%Y').upper())
+        amount = round(typical * rng.uniform(0.5, 1.5), 2)
+        yield day, description, amount, txn_type, category
+
+
+def write_csv(path, count, seed=0, layout='debit_credit'):
+    """Write a CSV statement; layout is 'debit_credit' or 'amount' (signed)"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        if layout == 'amount':
+            writer.writerow(['Date', 'Description', 'Amount'])
+        else:
+            writer.writerow(['Transaction Date', 'Particulars', 'Debit', 'Credit', 'Balance'])
+
+        balance = 100000.0
+        for day, description, amount, txn_type, _ in rows(count, seed):
+            if layout == 'amount':
+                writer.writerow([day.strftime('%d/%m/%Y'), description, amount if txn_type == 'income' else -amount])
+            else:
+                balance += amount if txn_type == 'income' else -amount
+                debit, credit = ('', f"{amount:,.2f}") if txn_type == 'income' else (f"{amount:,.2f}", '')
+                writer.writerow([day.strftime('%d/%m/%Y'), description, debit, credit, f"{balance:.2f}"])
+    return path
+
+
+def statement_lines(count, seed=0):
+    """PDF statement lines, alternating the two generic line grammars"""
+    for i, (day, description, amount, txn_type, _) in enumerate(rows(count, seed)):
+        if i % 2:
+            indicator = 'CR' if txn_type == 'income' else 'DR'
+            yield f"{day.strftime('%d/%m/%Y')} {description} {amount:,.2f} {indicator}"
+        else:
+            yield f"{day.strftime('%d %b %Y')} {description} {amount:,.2f}"
+
+
+def write_pdf(path, count, seed=0, lines_per_page=50):
+    """Write a text-only PDF statement that pdfplumber can extract.
+
+    Pages are streamed to the file; only the object offsets are kept.
+    """
+    lines = statement_lines(count, seed)
+    offsets = {}
+
+    with open(path, 'wb') as f:
+        def write_object(number, body):
+            offsets[number] = f.tell()
+            f.write(f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1'))
+
+        f.write(b"%PDF-1.4\n")
+        write_object(1, "<< /Type /Catalog /Pages 2 0 R >>")
+        write_object(3, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+        kids = []
+        number = 4
+        while True:
+            page = [next(lines, None) for _ in range(lines_per_page)]
+            page = [line for line in page if line is not None]
+            if not page and kids:
+                break
+            text = " ".join(
+                "(%s) '" % line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') for line in page
+            )
+            stream = f"BT /F1 8 Tf 14 TL 30 810 Td {text} ET"
+            write_object(number, (
+                "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {number + 1} 0 R >>"
+            ))
+            write_object(number + 1, f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+            kids.append(number)
+            number += 2
+            if len(page) < lines_per_page:
+                break
+
+        write_object(2, "<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{kid} 0 R" for kid in kids), len(kids)))
+
+        xref = f.tell()
+        f.write(f"xref\n0 {number}\n0000000000 65535 f \n".encode())
+        for i in range(1, number):
+            f.write(f"{offsets[i]:010d} 00000 n \n".encode())
+        f.write(f"trailer\n<< /Size {number} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return path
+
+
+def seed_transactions(count, user_ids, seed=0, batch_size=50000):
+    """Insert `count` transactions spread over `user_ids` straight into the database.
+
+    Must run inside an app context. Rollups are not updated here; call
+    rollups.rebuild_rollups() afterwards.
+    """
+    from storage import db
+    from models import Transaction
+
+    table = Transaction.__table__
+    batch = []
+    for i, (day, description, amount, txn_type, category) in enumerate(rows(count, seed)):
+        batch.append({
+            'user_id': user_ids[i % len(user_ids)],
+            'amount': amount,
+            'category': category,
+            'description': description,
+            'type': txn_type,
+            'timestamp': datetime(day.year, day.month, day.day),
+        })
+        if len(batch) == batch_size:
+            db.session.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+    db.session.commit()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Generate a synthetic bank statement")
+    arg_parser.add_argument('format', choices=['csv', 'pdf'])
+    arg_parser.add_argument('path')
+    arg_parser.add_argument('--rows', type=int, default=10000)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--layout', choices=['debit_credit', 'amount'], default='debit_credit')
+    args = arg_parser.parse_args()
+
+    if args.format == 'csv':
+        write_csv(args.path, args.rows, args.seed, args.layout)
+    else:
+        write_pdf(args.path, args.rows, args.seed)
+    print(f"Wrote {args.rows} rows to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""Benchmark statement ingestion, categorization and the aggregate endpoints.
+
+Each size gets fresh synthetic fixtures and temporary SQLite databases, and
+requests go through the Flask test client. Results are written as JSON,
+tagged with the git commit, so two runs can be compared with compare.py.
+
+    python benchmarks/run.py --rows 10000 100000 --output results.json
+    python benchmarks/run.py --rows 10000000 --suites aggregates
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import generate  # noqa: E402
+
+SUITES = ['parse', 'categorize', 'upload', 'aggregates']
+AGGREGATE_ENDPOINTS = [
+    '/balance',
+    '/summary',
+    '/monthly-balance',
+    '/summary-by-category',
+    '/category-breakdown',
+    '/dashboard',
+    '/transaction-insights',
+]
+UNCACHED_ENDPOINTS = {'/transaction-insights'}  # not wrapped in cached_response
+MAX_CATEGORIZE_ROWS = 1000000  # descriptions are held in memory for this suite
+SINGLE_PREDICTIONS = 2000
+PASSWORD = 'benchmark-password'
+
+
+def git_revision():
+    """(commit, dirty) of the working tree, or (None, None) outside git"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        status = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def timed(fn, repeat=1, before=None):
+    """Seconds taken by each of `repeat` calls to fn(); `before` runs untimed first"""
+    durations = []
+    for _ in range(repeat):
+        if before:
+            before()
+        started = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def result(suite, name, rows, durations, items=None, **extra):
+    """One benchmark record; `items` is what rows_per_second counts"""
+    median = statistics.median(durations)
+    record = {
+        'suite': suite,
+        'name': name,
+        'rows': rows,
+        'seconds': median,
+        'min_seconds': min(durations),
+        'repeat': len(durations),
+    }
+    if items:
+        record['rows_per_second'] = items / median if median else None
+    record.update(extra)
+    print(f"  {suite:<11} {name:<40} {median * 1000:>12.3f} ms")
+    return record
+
+
+class Bench:
+    """Temporary databases, fixtures and users for one benchmark size"""
+
+    def __init__(self, rows, args, workdir):
+        self.rows = rows
+        self.args = args
+        self.workdir = workdir
+
+    def make_app(self, name):
+        from api import create_app
+        from migrations import upgrade_schema
+        import snapshots
+
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(self.workdir, name)}.db",
+            'UPLOAD_FOLDER': os.path.join(self.workdir, 'uploads'),
+            'JWT_SECRET_KEY': 'benchmark-secret-key-0123456789abcdef',
+            'TESTING': True,
+        })
+        snapshots.SNAPSHOT_FOLDER = os.path.join(self.workdir, f"{name}-snapshots")
+        with app.app_context():
+            upgrade_schema()
+        return app
+
+    def login_users(self, client):
+        """Register benchmark users; returns [(user_id, auth headers)]"""
+        from models import User
+
+        users = []
+        for i in range(self.args.users):
+            username = f"bench{i}"
+            client.post('/register', json={'username': username, 'password': PASSWORD})
+            token = client.post('/login', json={'username': username, 'password': PASSWORD}).get_json()['token']
+            user_id = User.query.filter_by(username=username).first().id
+            users.append((user_id, {'Authorization': f"Bearer {token}"}))
+        return users
+
+    def fixture(self, kind, rows, seed=0):
+        path = os.path.join(self.workdir, f"statement-{seed}-{rows}.{kind}")
+        if not os.path.exists(path):
+            (generate.write_csv if kind == 'csv' else generate.write_pdf)(path, rows, seed)
+        return path
+
+    # -------------------------
+    # Suites
+    # -------------------------
+    def parse(self):
+        import classifier
+        from api import parser
+
+        csv_path = self.fixture('csv', self.rows)
+        pdf_rows = min(self.rows, self.args.pdf_rows)
+        pdf_path = self.fixture('pdf', pdf_rows)
+        app = self.make_app('parse')
+        chunk_size = app.config['STATEMENT_CHUNK_SIZE']
+
+        yield result('parse', 'iter_csv (parse + categorize)', self.rows, timed(
+            lambda: sum(len(chunk) for chunk in parser.iter_csv(csv_path, chunksize=chunk_size)),
+            self.args.repeat, before=classifier.category_cache.clear
+        ), items=self.rows)
+        yield result('parse', 'parse_pdf (parse + categorize)', pdf_rows, timed(
+            lambda: parser.parse_pdf(pdf_path), self.args.repeat, before=classifier.category_cache.clear
+        ), items=pdf_rows)
+
+    def categorize(self):
+        import classifier
+        from api import parser
+
+        rows = min(self.rows, MAX_CATEGORIZE_ROWS)
+        descriptions = [row[1] for row in generate.rows(rows)]
+        classifier.get_model()
+
+        yield result('categorize', 'categorize_transactions cold cache', rows, timed(
+            lambda: parser.categorize_transactions(descriptions), self.args.repeat,
+            before=classifier.category_cache.clear
+        ), items=rows)
+        yield result('categorize', 'categorize_transactions warm cache', rows, timed(
+            lambda: parser.categorize_transactions(descriptions), self.args.repeat
+        ), items=rows)
+
+        singles = descriptions[:SINGLE_PREDICTIONS]
+        classifier.category_cache.clear()
+        durations = timed(lambda: [parser.categorize_transaction(d) for d in singles], self.args.repeat,
+                          before=classifier.category_cache.clear)
+        yield result('categorize', 'categorize_transaction per call', rows,
+                     [duration / len(singles) for duration in durations], calls=len(singles))
+        yield result('categorize', 'model predict, one batch', rows, timed(
+            lambda: classifier.predict(descriptions), self.args.repeat
+        ), items=rows)
+
+    def upload(self):
+        app = self.make_app('upload')
+        client = app.test_client()
+        with app.app_context():
+            users = self.login_users(client)
+
+        # Each user uploads their own statement; together they add up to `rows`
+        per_user = max(1, self.rows // len(users))
+        statements = [self.fixture('csv', per_user, seed=i) for i in range(len(users))]
+
+        def upload_all():
+            for (_, headers), path in zip(users, statements):
+                with open(path, 'rb') as f:
+                    response = client.post(
+                        '/upload-statement?sync=1', headers=headers, content_type='multipart/form-data',
+                        data={'file': (f, os.path.basename(path))}
+                    )
+                assert response.status_code == 200, response.get_json()
+
+        yield result('upload', 'POST /upload-statement csv (new rows)', self.rows,
+                     timed(upload_all), items=per_user * len(users), users=len(users))
+        # Same files again: everything is a duplicate
+        yield result('upload', 'POST /upload-statement csv (duplicates)', self.rows,
+                     timed(upload_all, self.args.repeat), items=per_user * len(users), users=len(users))
+
+        pdf_rows = min(self.rows, self.args.pdf_rows)
+        pdf_path = self.fixture('pdf', pdf_rows, seed=len(users))
+
+        def upload_pdf():
+            with open(pdf_path, 'rb') as f:
+                response = client.post(
+                    '/upload-statement?sync=1', headers=users[0][1], content_type='multipart/form-data',
+                    data={'file': (f, os.path.basename(pdf_path))}
+                )
+            assert response.status_code == 200, response.get_json()
+
+        yield result('upload', 'POST /upload-statement pdf (new rows)', pdf_rows, timed(upload_pdf), items=pdf_rows)
+
+    def aggregates(self):
+        import snapshots
+        from response_cache import cache
+        from rollups import rebuild_rollups
+
+        app = self.make_app('aggregates')
+        client = app.test_client()
+        with app.app_context():
+            users = self.login_users(client)
+            started = time.perf_counter()
+            generate.seed_transactions(self.rows, [user_id for user_id, _ in users])
+            seed_seconds = time.perf_counter() - started
+            rebuild_rollups()
+            if snapshots.available():
+                for user_id, _ in users:
+                    snapshots.refresh_snapshot(user_id)
+        print(f"  seeded {self.rows} transactions in {seed_seconds:.1f}s")
+
+        headers = users[0][1]
+        for endpoint in AGGREGATE_ENDPOINTS:
+            def get():
+                response = client.get(endpoint, headers=headers)
+                assert response.status_code == 200, (endpoint, response.status_code)
+
+            yield result('aggregates', f"GET {endpoint} uncached", self.rows,
+                         timed(get, self.args.repeat, before=cache.clear))
+            if endpoint not in UNCACHED_ENDPOINTS:
+                yield result('aggregates', f"GET {endpoint} cached", self.rows, timed(get, self.args.repeat))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Run the backend benchmarks")
+    arg_parser.add_argument('--rows', type=int, nargs='+', default=[10000],
+                            help='statement/transaction sizes to run, e.g. 10000 100000 10000000')
+    arg_parser.add_argument('--users', type=int, default=3)
+    arg_parser.add_argument('--pdf-rows', type=int, default=5000,
+                            help='cap on PDF fixture rows; pdfplumber makes large PDFs slow')
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--suites', nargs='+', choices=SUITES, default=SUITES)
+    arg_parser.add_argument('--output', help='write results to this JSON file')
+    args = arg_parser.parse_args()
+    logging.disable(logging.INFO)  # per-import log lines would swamp the output
+
+    commit, dirty = git_revision()
+    report = {
+        'meta': {
+            'commit': commit,
+            'dirty': dirty,
+            'created_at': datetime.now().isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'rows': args.rows,
+            'users': args.users,
+            'repeat': args.repeat,
+        },
+        'results': [],
+    }
+
+    for rows in args.rows:
+        print(f"{rows} rows")
+        with tempfile.TemporaryDirectory(prefix='finance-bench-') as workdir:
+            bench = Bench(rows, args, workdir)
+            for suite in args.suites:
+                report['results'].extend(getattr(bench, suite)())
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+        print(f"Results written to {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
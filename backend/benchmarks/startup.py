@@ -0,0 +1,72 @@
+"""Cold-start benchmark for the API.
+
+Each run starts a fresh interpreter and times importing api, building the
+app with create_app() and the first prediction, with and without warm-up.
+
+    python benchmarks/startup.py --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one JSON line of timings in seconds
+CHILD = r'''
+import json, sys, time
+t0 = time.perf_counter()
+import api
+t1 = time.perf_counter()
+app = api.create_app({'WARM_UP': sys.argv[1] == '1', 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+t2 = time.perf_counter()
+api.classifier.predict(['grocery store'])
+t3 = time.perf_counter()
+print(json.dumps({'import': t1 - t0, 'create_app': t2 - t1, 'first_predict': t3 - t2, 'total': t3 - t0}))
+'''
+
+
+def run_once(warm_up):
+    """Time one cold start in a new interpreter"""
+    start = subprocess.run(
+        [sys.executable, '-c', CHILD, '1' if warm_up else '0'],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(start.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples):
+    """Median and min of each timing across runs"""
+    return {
+        key: {
+            'median': statistics.median(s[key] for s in samples),
+            'min': min(s[key] for s in samples),
+        }
+        for key in samples[0]
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--runs', type=int, default=5)
+    arg_parser.add_argument('--output', help='write results to this JSON file')
+    args = arg_parser.parse_args()
+
+    results = {
+        'python': sys.version.split()[0],
+        'runs': args.runs,
+        'lazy': summarize([run_once(False) for _ in range(args.runs)]),
+        'warm_up': summarize([run_once(True) for _ in range(args.runs)]),
+    }
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
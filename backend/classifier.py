@@ -0,0 +1,312 @@
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'transaction_classifier.pkl')
+ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'transaction_classifier')
+CATEGORY_CACHE_SIZE = 10000  # distinct normalized descriptions kept
+BATCH_WINDOW = 0.002  # seconds a single prediction waits for others to join its batch
+MAX_BATCH = 64  # single predictions coalesced into one model call
+RELOAD_CHECK_INTERVAL = 1.0  # seconds between checks of the model file
+
+_REFERENCE_RE = re.compile(r'\w*\d\w*')  # reference numbers, dates, amounts
+_SEPARATOR_RE = re.compile(r'[\W_]+')
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class Predictor:
+    """Serves the classifier: lazy load, hot reload and micro-batching.
+
+    The compact NumPy export in `artifact_dir` (see compact_model) is served
+    when it is at least as new as the pickle; otherwise the pickle is.
+
+    The model is swapped in as one attribute assignment after the new pickle
+    has loaded, so a request in flight keeps using the model it started with
+    and a half-written or broken file never replaces a working model.
+
+    predict_one() calls from concurrent requests are queued and run as a
+    single model call once BATCH_WINDOW has passed or MAX_BATCH rows are
+    waiting.
+    """
+
+    def __init__(self, path=MODEL_PATH, artifact_dir=ARTIFACT_DIR, batch_window=BATCH_WINDOW,
+                 max_batch=MAX_BATCH, on_reload=None):
+        self.path = path
+        self.artifact_dir = artifact_dir
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.on_reload = on_reload
+        self._model = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._load_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._counters = {
+            'rows': 0,
+            'batches': 0,
+            'predict_seconds': 0.0,
+            'single_requests': 0,
+            'single_seconds': 0.0,
+            'single_max_seconds': 0.0,
+            'reloads': 0,
+            'reload_failures': 0,
+        }
+
+    def _signature_now(self):
+        return (_file_signature(self.path), _file_signature(os.path.join(self.artifact_dir, 'manifest.json')))
+
+    def _load(self):
+        """(model, source signature); logs which artifact was loaded"""
+        signature = self._signature_now()
+        pickle_signature, manifest_signature = signature
+        if manifest_signature and (not pickle_signature or manifest_signature[0] >= pickle_signature[0]):
+            from compact_model import CompactModel
+
+            try:
+                model = CompactModel.load(self.artifact_dir)
+                logger.info(f"Loaded compact classifier from {self.artifact_dir}")
+                return model, signature
+            except Exception as e:
+                logger.warning(f"Compact classifier in {self.artifact_dir} failed to load, using the pickle: {e}")
+
+        import joblib  # pulls in scikit-learn; only needed once a prediction is made
+
+        model = joblib.load(self.path)
+        logger.info(f"Loaded classifier from {self.path}")
+        return model, signature
+
+    def model(self):
+        """The current model, loading it on first use"""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self._model, self._signature = self._load()
+                    self._checked_at = time.monotonic()
+        return self._model
+
+    def check_reload(self, force=False):
+        """Swap in the model file if it changed since it was loaded; True if swapped"""
+        now = time.monotonic()
+        if self._model is None or (not force and now - self._checked_at < RELOAD_CHECK_INTERVAL):
+            return False
+        self._checked_at = now
+        if self._signature_now() == self._signature:
+            return False
+
+        with self._load_lock:
+            if self._signature_now() == self._signature:
+                return False
+            try:
+                model, signature = self._load()
+            except Exception as e:
+                # Keep serving the old model; the next check retries
+                self._count('reload_failures')
+                logger.warning(f"Classifier reload failed: {e}")
+                return False
+            self._model, self._signature = model, signature
+
+        self._count('reloads')
+        logger.info("Reloaded classifier")
+        if self.on_reload:
+            self.on_reload()
+        return True
+
+    def predict(self, descriptions):
+        """Predict a category for each description in one model call"""
+        model = self.model()
+        started = time.perf_counter()
+        predicted = model.predict(descriptions)
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            self._counters['rows'] += len(descriptions)
+            self._counters['batches'] += 1
+            self._counters['predict_seconds'] += elapsed
+        return predicted
+
+    def predict_one(self, description):
+        """Predict one description, sharing a model call with concurrent requests"""
+        self._ensure_worker()
+        started = time.perf_counter()
+        future = Future()
+        self._queue.put((description, future))
+        category = future.result()
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            self._counters['single_requests'] += 1
+            self._counters['single_seconds'] += elapsed
+            self._counters['single_max_seconds'] = max(self._counters['single_max_seconds'], elapsed)
+        return category
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._serve, name='predictor', daemon=True)
+                    self._worker.start()
+
+    def _serve(self):
+        """Worker loop: collect queued single predictions into batches"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            try:
+                predicted = self.predict([description for description, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), category in zip(batch, predicted):
+                future.set_result(category)
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        """Latency and throughput counters since startup"""
+        with self._stats_lock:
+            counters = dict(self._counters)
+        return {
+            **counters,
+            'avg_batch_size': counters['rows'] / counters['batches'] if counters['batches'] else 0.0,
+            'rows_per_second': counters['rows'] / counters['predict_seconds'] if counters['predict_seconds'] else 0.0,
+            'single_avg_seconds': (
+                counters['single_seconds'] / counters['single_requests'] if counters['single_requests'] else 0.0
+            ),
+            'uptime_seconds': time.monotonic() - self._started_at,
+        }
+
+
+def normalize_description(description):
+    """Cache key for a narration: case-folded, without digits or reference numbers.
+
+    'UPI/402918/SWIGGY BLR' and 'UPI/771203/Swiggy blr' both become 'upi swiggy blr'.
+    """
+    text = _REFERENCE_RE.sub(' ', description.casefold())
+    return _SEPARATOR_RE.sub(' ', text).strip()
+
+
+class CategoryCache:
+    """Thread-safe LRU of predicted category by normalized description"""
+
+    def __init__(self, maxsize=CATEGORY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        """Cached category for each key, or None; empty keys are always misses"""
+        categories = []
+        with self._lock:
+            for key in keys:
+                category = self._entries.get(key) if key else None
+                if category is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                categories.append(category)
+        return categories
+
+    def set(self, key, category):
+        with self._lock:
+            self._entries[key] = category
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+
+category_cache = CategoryCache()
+predictor = Predictor(on_reload=category_cache.clear)
+
+
+def get_model():
+    """The classifier currently being served"""
+    return predictor.model()
+
+
+def predict(descriptions):
+    """Predict a category for each description"""
+    return predictor.predict(descriptions)
+
+
+def categorize(descriptions):
+    """Predict categories, running the model only for descriptions not seen before.
+
+    Misses are predicted in one batch, once per distinct normalized description;
+    a lone miss goes through the predictor's micro-batching queue instead.
+    """
+    predictor.check_reload()
+    keys = [normalize_description(description) for description in descriptions]
+    categories = category_cache.get_many(keys)
+
+    pending = {}
+    for i, (key, category) in enumerate(zip(keys, categories)):
+        if category is None:
+            # Descriptions with nothing left after normalization are not cached
+            pending.setdefault(key or i, []).append(i)
+    if not pending:
+        return categories
+
+    positions = list(pending.values())
+    if len(positions) == 1:
+        predicted = [predictor.predict_one(descriptions[positions[0][0]])]
+    else:
+        predicted = predictor.predict([descriptions[indices[0]] for indices in positions])
+    for key, indices, category in zip(pending, positions, predicted):
+        if isinstance(key, str):
+            category_cache.set(key, category)
+        for i in indices:
+            categories[i] = category
+    return categories
+
+
+def warm_up():
+    """Load the classifier and the parsing libraries ahead of the first request"""
+    get_model()
+    import pandas  # noqa: F401
+    import pdfplumber  # noqa: F401
@@ -0,0 +1,253 @@
+"""Compact classifier artifacts: NumPy arrays plus a JSON manifest.
+
+train_model.py exports the fitted vectorizer + MultinomialNB pipeline to a
+directory of .npy files. CompactModel loads them with mmap_mode='r', so a
+worker starts in milliseconds without importing scikit-learn, and workers
+on one machine share the arrays' pages through the OS page cache.
+Predictions match the sklearn Pipeline's.
+"""
+import json
+import os
+import re
+import time
+import uuid
+from functools import lru_cache
+
+import numpy as np
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+
+_MASK32 = 0xffffffff
+
+
+def _rotl32(value, shift):
+    return ((value << shift) | (value >> (32 - shift))) & _MASK32
+
+
+@lru_cache(maxsize=65536)
+def murmurhash3_32(token):
+    """Signed 32-bit MurmurHash3 (x86) of a token's UTF-8 bytes, seed 0.
+
+    Same value as sklearn.utils.murmurhash3_32, which HashingVectorizer uses.
+    """
+    data = token.encode('utf-8')
+    c1, c2 = 0xcc9e2d51, 0x1b873593
+    h = 0
+    body = len(data) - len(data) % 4
+
+    for i in range(0, body, 4):
+        k = int.from_bytes(data[i:i + 4], 'little')
+        k = _rotl32((k * c1) & _MASK32, 15)
+        h ^= (k * c2) & _MASK32
+        h = (_rotl32(h, 13) * 5 + 0xe6546b64) & _MASK32
+
+    tail = data[body:]
+    if tail:
+        k = int.from_bytes(tail, 'little')
+        k = _rotl32((k * c1) & _MASK32, 15)
+        h ^= (k * c2) & _MASK32
+
+    h ^= len(data)
+    h ^= h >> 16
+    h = (h * 0x85ebca6b) & _MASK32
+    h ^= h >> 13
+    h = (h * 0xc2b2ae35) & _MASK32
+    h ^= h >> 16
+    return h - 0x100000000 if h & 0x80000000 else h
+
+
+# -------------------------
+# Export
+# -------------------------
+def _text_params(vectorizer):
+    """Analyzer settings we can reproduce; anything custom cannot be exported"""
+    if vectorizer.analyzer != 'word':
+        raise ValueError(f"Cannot export analyzer={vectorizer.analyzer!r}; only 'word' is supported")
+    for name in ('preprocessor', 'tokenizer', 'stop_words', 'strip_accents'):
+        if getattr(vectorizer, name) is not None:
+            raise ValueError(f"Cannot export a vectorizer with {name} set")
+    return {
+        'lowercase': vectorizer.lowercase,
+        'token_pattern': vectorizer.token_pattern,
+        'ngram_range': list(vectorizer.ngram_range),
+        'binary': vectorizer.binary,
+        'norm': vectorizer.norm,
+    }
+
+
+def export_model(pipeline, directory):
+    """Write a fitted (TfidfVectorizer | HashingVectorizer) + MultinomialNB pipeline.
+
+    Arrays are written under a fresh export id, then the manifest naming them
+    is swapped in with os.replace; files from older exports are removed.
+    """
+    if len(pipeline.steps) != 2:
+        raise ValueError("Expected a vectorizer + classifier pipeline")
+    vectorizer, clf = pipeline.steps[0][1], pipeline.steps[1][1]
+    if type(clf).__name__ != 'MultinomialNB':
+        raise ValueError(f"Cannot export {type(clf).__name__}; only MultinomialNB is supported")
+
+    kind = type(vectorizer).__name__
+    params = _text_params(vectorizer)
+    arrays = {
+        # Transposed to (n_features, n_classes) so a document's rows are gathered at once
+        'feature_log_prob': np.ascontiguousarray(clf.feature_log_prob_.T, dtype=np.float64),
+        'class_log_prior': np.asarray(clf.class_log_prior_, dtype=np.float64),
+    }
+
+    if kind == 'TfidfVectorizer':
+        terms = sorted(vectorizer.vocabulary_)
+        arrays['terms'] = np.array(terms, dtype=str)
+        arrays['term_index'] = np.array([vectorizer.vocabulary_[term] for term in terms], dtype=np.int64)
+        params.update(use_idf=vectorizer.use_idf, sublinear_tf=vectorizer.sublinear_tf)
+        if vectorizer.use_idf:
+            arrays['idf'] = np.asarray(vectorizer.idf_, dtype=np.float64)
+    elif kind == 'HashingVectorizer':
+        params.update(n_features=vectorizer.n_features, alternate_sign=vectorizer.alternate_sign)
+    else:
+        raise ValueError(f"Cannot export {kind}")
+
+    os.makedirs(directory, exist_ok=True)
+    export_id = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    files = {}
+    for name, array in arrays.items():
+        files[name] = f"{export_id}.{name}.npy"
+        np.save(os.path.join(directory, files[name]), array)
+
+    manifest = {
+        'format': FORMAT_VERSION,
+        'export_id': export_id,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'vectorizer': kind,
+        'params': params,
+        'classes': [str(label) for label in clf.classes_],
+        'arrays': files,
+    }
+    tmp_path = os.path.join(directory, f"{MANIFEST}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST))
+
+    # Workers that still map old arrays keep their open pages after the unlink
+    for name in os.listdir(directory):
+        if name.endswith('.npy') and name not in files.values():
+            os.remove(os.path.join(directory, name))
+
+    return manifest
+
+
+# -------------------------
+# Inference
+# -------------------------
+class CompactModel:
+    """Pure-NumPy predict() over an exported classifier"""
+
+    def __init__(self, manifest, arrays):
+        self.manifest = manifest
+        self.kind = manifest['vectorizer']
+        self.params = manifest['params']
+        self.classes_ = np.array(manifest['classes'])
+        self._arrays = arrays
+        self._token_re = re.compile(self.params['token_pattern'])
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+        if manifest.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported model artifact format {manifest.get('format')}")
+        arrays = {
+            name: np.load(os.path.join(directory, filename), mmap_mode='r')
+            for name, filename in manifest['arrays'].items()
+        }
+        return cls(manifest, arrays)
+
+    def _analyze(self, doc):
+        """Tokens and word n-grams, as CountVectorizer's 'word' analyzer builds them"""
+        if self.params['lowercase']:
+            doc = doc.lower()
+        tokens = self._token_re.findall(doc)
+
+        min_n, max_n = self.params['ngram_range']
+        if max_n == 1:
+            return tokens
+        original_tokens = tokens
+        if min_n == 1:
+            tokens = list(original_tokens)
+            min_n += 1
+        else:
+            tokens = []
+        for n in range(min_n, min(max_n + 1, len(original_tokens) + 1)):
+            for i in range(len(original_tokens) - n + 1):
+                tokens.append(' '.join(original_tokens[i:i + n]))
+        return tokens
+
+    def _token_features(self, all_tokens):
+        """(feature index, value) per token; index -1 for tokens outside the vocabulary"""
+        if self.kind == 'HashingVectorizer':
+            n_features = self.params['n_features']
+            hashes = np.array([murmurhash3_32(token) for token in all_tokens], dtype=np.int64)
+            values = np.ones(len(hashes))
+            if self.params['alternate_sign']:
+                values[hashes < 0] = -1.0
+            return np.abs(hashes) % n_features, values
+
+        # One vectorized vocabulary lookup for the whole batch
+        terms = self._arrays['terms']
+        if not len(terms):
+            return np.full(len(all_tokens), -1, dtype=np.int64), np.ones(len(all_tokens))
+        lookup = np.array(all_tokens, dtype=str)
+        positions = np.minimum(np.searchsorted(terms, lookup), len(terms) - 1)
+        features = np.where(terms[positions] == lookup, self._arrays['term_index'][positions], -1)
+        return features, np.ones(len(all_tokens))
+
+    def _rows(self, descriptions):
+        """The batch as sparse rows: (row per entry, feature per entry, summed count).
+
+        Entries are sorted by row, then feature, the order sklearn's CSR
+        matrices use, so sums run in the same order.
+        """
+        docs_tokens = [self._analyze(description) for description in descriptions]
+        all_tokens = [token for tokens in docs_tokens for token in tokens]
+        if not all_tokens:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        rows = np.repeat(np.arange(len(docs_tokens)), [len(tokens) for tokens in docs_tokens])
+        features, values = self._token_features(all_tokens)
+        known = features >= 0
+        rows, features, values = rows[known], features[known], values[known]
+
+        n_features = self._arrays['feature_log_prob'].shape[0]
+        keys, inverse = np.unique(rows * n_features + features, return_inverse=True)
+        counts = np.bincount(inverse.ravel(), weights=values, minlength=len(keys))
+        return keys // n_features, keys % n_features, counts
+
+    def predict(self, descriptions):
+        """Predicted class for each description, like Pipeline.predict"""
+        rows, features, values = self._rows(descriptions)
+        jll = np.tile(np.asarray(self._arrays['class_log_prior']), (len(descriptions), 1))
+        if not values.size:
+            return self.classes_[np.argmax(jll, axis=1)] if len(descriptions) else self.classes_[:0]
+
+        if self.params['binary']:
+            values[:] = 1.0
+        if self.params.get('sublinear_tf'):
+            values = np.log(values) + 1
+        if self.params.get('use_idf'):
+            values = values * self._arrays['idf'][features]
+
+        row_ids, starts, lengths = np.unique(rows, return_index=True, return_counts=True)
+        norm = self.params['norm']
+        if norm in ('l1', 'l2'):
+            if norm == 'l2':
+                totals = np.sqrt(np.add.reduceat(values * values, starts))
+            else:
+                totals = np.add.reduceat(np.abs(values), starts)
+            totals[totals == 0] = 1.0
+            values = values / np.repeat(totals, lengths)
+
+        # Sparse rows x dense (n_features, n_classes): gather, scale, sum per row
+        contributions = self._arrays['feature_log_prob'][features] * values[:, None]
+        jll[row_ids] += np.add.reduceat(contributions, starts, axis=0)
+        return self.classes_[np.argmax(jll, axis=1)]
@@ -0,0 +1,84 @@
+from sqlalchemy import insert
+from storage import db
+from models import Transaction
+from rollups import add_to_rollups
+
+
+def transaction_key(description, amount, timestamp):
+    """Identity used to detect duplicate transactions"""
+    return (description, float(amount), timestamp)
+
+
+def filter_duplicates(transactions, user_id):
+    """Drop parsed transactions that are already stored or repeated in the batch.
+
+    Existing rows are fetched with a single range query over the batch's
+    timestamps instead of one lookup per row. Returns a tuple of
+    (new_transactions, duplicate_count).
+    """
+    if not transactions:
+        return [], 0
+
+    timestamps = [t['timestamp'] for t in transactions]
+    existing = db.session.query(
+        Transaction.description,
+        Transaction.amount,
+        Transaction.timestamp
+    ).filter(
+        Transaction.user_id == user_id,
+        Transaction.timestamp >= min(timestamps),
+        Transaction.timestamp <= max(timestamps)
+    )
+
+    seen = {transaction_key(*row) for row in existing}
+    new_transactions = []
+
+    for trans_data in transactions:
+        key = transaction_key(trans_data['description'], trans_data['amount'], trans_data['timestamp'])
+        if key in seen:
+            continue  # Already stored, or repeated earlier in this file
+        seen.add(key)
+        new_transactions.append(trans_data)
+
+    return new_transactions, len(transactions) - len(new_transactions)
+
+
+def bulk_insert_transactions(transactions, user_id=None, batch_size=1000, errors=None):
+    """Insert parsed transaction dicts with Core executemany batches.
+
+    Each batch is committed on its own. A failing batch is rolled back and
+    reported in `errors` without affecting the others. Rows are named by the
+    statement row the parser read them from ('row'), falling back to their
+    position in `transactions`. Returns the number of rows inserted.
+    """
+    statement = insert(Transaction.__table__)
+    saved_count = 0
+
+    for start in range(0, len(transactions), batch_size):
+        batch = transactions[start:start + batch_size]
+        rows = []
+        for trans_data in batch:
+            row = {
+                'description': trans_data['description'],
+                'amount': trans_data['amount'],
+                'timestamp': trans_data['timestamp'],
+                'type': trans_data['type'],
+                'category': trans_data['category']
+            }
+            if user_id is not None:
+                row['user_id'] = user_id
+            rows.append(row)
+
+        try:
+            db.session.execute(statement, rows)
+            add_to_rollups(rows)
+            db.session.commit()
+            saved_count += len(rows)
+        except Exception as e:
+            db.session.rollback()
+            if errors is not None:
+                first = batch[0].get('row', start + 1)
+                last = batch[-1].get('row', start + len(batch))
+                errors.append(f"Error saving rows {first}-{last}: {str(e)}")
+
+    return saved_count
@@ -1,6 +1,9 @@
-from api import app, db
+from api import create_app, db
 from models import Transaction  
+from migrations import upgrade_schema
+
+app = create_app()
 
 with app.app_context():
-    db.create_all()
+    upgrade_schema()
     print("Database initialized.")
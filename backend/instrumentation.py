@@ -0,0 +1,334 @@
+"""Request timing, SQL query metrics, named spans and opt-in profiling.
+
+Metrics are kept in memory per process and rendered in the Prometheus text
+format by render_metrics() (served at /metrics). Every response carries a
+Server-Timing header with the request's total time, its SQL time and query
+count, and each span it ran.
+
+Profiling is opt-in: with PROFILE_REQUESTS enabled, a request sent with
+?profile=1 (or an X-Profile: 1 header) is profiled with pyinstrument if it
+is installed, else cProfile, and the dump is written to PROFILE_DIR.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:  # optional; cProfile is used instead
+    PyinstrumentProfiler = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry = []
+_collectors = []
+_local = threading.local()
+
+
+# -------------------------
+# Metric types
+# -------------------------
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with _sum and _count, as Prometheus expects"""
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, *labels):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(state)) for labels, state in self._values.items())
+        for labels, state in items:
+            for bound, count in zip(self.buckets, state):
+                le = _format_labels(self.labelnames, labels, [('le', repr(bound))])
+                lines.append(f"{self.name}_bucket{le} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', '+Inf')])} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {state[-1]}")
+        return lines
+
+
+REQUESTS = Counter('http_requests_total', 'Requests handled', ['method', 'endpoint', 'status'])
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Time to build the response', ['method', 'endpoint'])
+QUERIES = Counter('db_queries_total', 'SQL statements executed', ['endpoint'])
+QUERY_SECONDS = Histogram('db_query_duration_seconds', 'SQL statement execution time', ['endpoint'])
+SPAN_SECONDS = Histogram('span_duration_seconds', 'Time spent in named stages such as parse or insert', ['span'])
+
+
+def register_collector(collect):
+    """Add a callable returning extra exposition lines to render_metrics()"""
+    _collectors.append(collect)
+
+
+def gauge_lines(name, help_text, value, metric_type='gauge'):
+    """Exposition lines for a single unlabelled value"""
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}", f"{name} {_format_value(value)}"]
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        try:
+            lines.extend(collect())
+        except Exception as e:
+            logger.warning(f"Metrics collector failed: {e}")
+    return '\n'.join(lines) + '\n'
+
+
+# -------------------------
+# Spans
+# -------------------------
+def _active_timings():
+    if not hasattr(_local, 'timings'):
+        _local.timings = []
+    return _local.timings
+
+
+def _deactivate(timings):
+    # By identity: nested collectors see the same records, so they compare equal
+    active = _active_timings()
+    active[:] = [t for t in active if t is not timings]
+
+
+@contextmanager
+def collect_timings():
+    """Collect {name: [count, seconds]} for spans and queries run by this thread"""
+    timings = {}
+    _active_timings().append(timings)
+    try:
+        yield timings
+    finally:
+        _deactivate(timings)
+
+
+def _record(name, seconds):
+    for timings in _active_timings():
+        entry = timings.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+
+@contextmanager
+def span(name):
+    """Time a named stage; spans may nest, each is recorded on its own"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        SPAN_SECONDS.observe(elapsed, name)
+        _record(name, elapsed)
+
+
+def timed_iter(iterable, name):
+    """Yield from `iterable`, timing the work done to produce each item as a span"""
+    iterator = iter(iterable)
+    while True:
+        with span(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def summarize(timings):
+    """{name: {'count', 'seconds'}} for logging or JSON responses"""
+    return {name: {'count': count, 'seconds': round(seconds, 6)} for name, (count, seconds) in timings.items()}
+
+
+# -------------------------
+# SQL queries
+# -------------------------
+def _query_endpoint():
+    if has_request_context():
+        return request.endpoint or 'unmatched'
+    return 'background'
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    endpoint = _query_endpoint()
+    QUERIES.inc(endpoint)
+    QUERY_SECONDS.observe(elapsed, endpoint)
+    _record('db', elapsed)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    # The statement failed, so after_cursor_execute will not pop its start time
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+# -------------------------
+# Flask integration
+# -------------------------
+def _profiling_requested(app):
+    if not app.config.get('PROFILE_REQUESTS'):
+        return False
+    return request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1'
+
+
+def _start_profiler():
+    if PyinstrumentProfiler is not None:
+        profiler = PyinstrumentProfiler()
+        profiler.start()
+        return profiler
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def _is_pyinstrument(profiler):
+    return PyinstrumentProfiler is not None and isinstance(profiler, PyinstrumentProfiler)
+
+
+def _stop_profiler(profiler):
+    if _is_pyinstrument(profiler):
+        profiler.stop()
+    else:
+        profiler.disable()
+
+
+def _dump_profile(app, profiler):
+    """Stop the profiler and write its dump; returns the file path"""
+    directory = app.config.get('PROFILE_DIR', 'profiles')
+    os.makedirs(directory, exist_ok=True)
+    endpoint = re.sub(r'[^\w.-]+', '_', request.endpoint or 'unmatched')
+    stem = os.path.join(directory, f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{endpoint}")
+
+    _stop_profiler(profiler)
+    if _is_pyinstrument(profiler):
+        path = f"{stem}.html"
+        with open(path, 'w') as f:
+            f.write(profiler.output_html())
+    else:
+        path = f"{stem}.prof"
+        profiler.dump_stats(path)
+    return path
+
+
+def _server_timing(total, timings):
+    entries = [f"app;dur={total * 1000:.2f}"]
+    for name, (count, seconds) in timings.items():
+        description = f';desc="{count} queries"' if name == 'db' else ''
+        entries.append(f"{name};dur={seconds * 1000:.2f}{description}")
+    return ', '.join(entries)
+
+
+def init_app(app):
+    """Time every request, count its queries and run the opt-in profiler"""
+    app.config.setdefault('PROFILE_REQUESTS', os.environ.get('FINANCE_PROFILE') == '1')
+    app.config.setdefault('PROFILE_DIR', 'profiles')
+
+    @app.before_request
+    def start_request_timing():
+        g.request_timings = {}
+        _active_timings().append(g.request_timings)
+        g.request_started = time.perf_counter()
+        g.profiler = _start_profiler() if _profiling_requested(app) else None
+
+    @app.after_request
+    def finish_request_timing(response):
+        if 'request_started' not in g:
+            return response
+        total = time.perf_counter() - g.request_started
+
+        endpoint = request.endpoint or 'unmatched'
+        REQUESTS.inc(request.method, endpoint, str(response.status_code))
+        REQUEST_SECONDS.observe(total, request.method, endpoint)
+        response.headers['Server-Timing'] = _server_timing(total, g.request_timings)
+
+        if g.profiler is not None:
+            path = _dump_profile(app, g.pop('profiler'))
+            response.headers['X-Profile-Path'] = path
+            logger.info(f"Profile for {request.method} {request.path} written to {path}")
+        return response
+
+    @app.teardown_request
+    def stop_request_timing(exc):
+        profiler = g.pop('profiler', None)
+        if profiler is not None:  # the request failed before after_request ran
+            _stop_profiler(profiler)
+        timings = g.pop('request_timings', None)
+        if timings is not None:
+            _deactivate(timings)
@@ -0,0 +1,93 @@
+import json
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from storage import db
+from models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+MAX_STORED_ERRORS = 50
+
+
+class JobQueue:
+    """Local worker pool for statement imports.
+
+    Jobs are persisted in the ImportJob table, so the app's own SQLite
+    database is the queue and no external broker is needed. `runner` is
+    called as runner(file_path, user_id, progress) inside an app context
+    and must return the import totals.
+    """
+
+    def __init__(self, app, runner, max_workers=2):
+        self.app = app
+        self.runner = runner
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='import-job')
+
+    def submit(self, user_id, filename, file_path):
+        """Record a queued job and hand it to the worker pool"""
+        job = ImportJob(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            filename=filename,
+            file_path=file_path,
+            status='queued'
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        self.executor.submit(self._run, job.id)
+        return job
+
+    def resume(self):
+        """Re-queue jobs left queued or running by a previous process"""
+        with self.app.app_context():
+            pending = ImportJob.query.filter(ImportJob.status.in_(['queued', 'running'])).all()
+            job_ids = [job.id for job in pending]
+            for job in pending:
+                job.status = 'queued'
+            db.session.commit()
+
+        for job_id in job_ids:
+            self.executor.submit(self._run, job_id)
+
+        if job_ids:
+            logger.info(f"Resumed {len(job_ids)} import jobs")
+        return len(job_ids)
+
+    def _run(self, job_id):
+        with self.app.app_context():
+            job = db.session.get(ImportJob, job_id)
+            if job is None:
+                return
+
+            job.status = 'running'
+            job.started_at = datetime.utcnow()
+            db.session.commit()
+
+            def progress(result):
+                job.rows_parsed = result['total_parsed']
+                job.saved_count = result['saved_count']
+                job.duplicate_count = result['duplicate_count']
+                job.error_count = len(result['errors'])
+                job.errors = json.dumps(result['errors'][:MAX_STORED_ERRORS])
+                db.session.commit()
+
+            try:
+                progress(self.runner(job.file_path, job.user_id, progress))
+                job.status = 'completed'
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Import job {job_id} failed: {e}")
+                job.status = 'failed'
+                job.message = str(e)[:500]
+            finally:
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+
+                # Clean up uploaded file
+                if job.file_path and os.path.exists(job.file_path):
+                    os.remove(job.file_path)
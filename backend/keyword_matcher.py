@@ -0,0 +1,75 @@
+from collections import deque
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over a {category: [keywords]} mapping.
+
+    Every keyword of every category is found in one pass over the text.
+    Categories are ranked by their order in the mapping. When several
+    categories match, the one listed first wins, just like checking the
+    keyword lists in order. Matching is case-insensitive substring
+    matching, the same as `keyword in text.lower()`.
+    """
+
+    def __init__(self, mapping):
+        self.categories = list(mapping)
+        self._no_match = len(self.categories)
+
+        # Trie of all keywords; node 0 is the root
+        goto = [{}]
+        output = [frozenset()]
+        for rank, keywords in enumerate(mapping.values()):
+            for keyword in keywords:
+                node = 0
+                for char in keyword.lower():
+                    if char not in goto[node]:
+                        goto[node][char] = len(goto)
+                        goto.append({})
+                        output.append(frozenset())
+                    node = goto[node][char]
+                output[node] = output[node] | {rank}
+
+        # Breadth-first, fill in the fail transitions so every state has a
+        # direct move for every keyword character (characters not used by any
+        # keyword go back to the root)
+        self._delta = [dict(goto[0])]
+        self._delta.extend({} for _ in range(len(goto) - 1))
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            output[node] = output[node] | output[fail[node]]
+            moves = dict(self._delta[fail[node]])
+            for char, child in goto[node].items():
+                fail[child] = self._delta[fail[node]].get(char, 0)
+                moves[char] = child
+                queue.append(child)
+            self._delta[node] = moves
+
+        # Ranks of the categories matched on reaching each state
+        self._output = output
+        self._best = [min(ranks, default=self._no_match) for ranks in output]
+
+    def matches(self, text):
+        """All matching categories, highest priority first"""
+        delta, output = self._delta, self._output
+        node = 0
+        ranks = set()
+        for char in text.lower():
+            node = delta[node].get(char, 0)
+            if output[node]:
+                ranks |= output[node]
+        return [self.categories[rank] for rank in sorted(ranks)]
+
+    def first_match(self, text, default=None):
+        """The highest-priority matching category, or `default`"""
+        delta, best = self._delta, self._best
+        node = 0
+        found = self._no_match
+        for char in text.lower():
+            node = delta[node].get(char, 0)
+            if best[node] < found:
+                found = best[node]
+                if not found:
+                    break
+        return self.categories[found] if found < self._no_match else default
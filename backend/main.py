@@ -1,6 +1,11 @@
 from models import db, Transaction
-from api import app  # Access Flask app with db context
+from api import create_app, parser
 from utils import categorize
+from importer import bulk_insert_transactions
+from aggregates import balance_summary
+from migrations import upgrade_schema
+
+app = create_app()  # Flask app for db context
 
 def add_transaction():
     with app.app_context():
@@ -15,25 +20,44 @@ def add_transaction():
         db.session.commit()
         print("Transaction added.")
 
+def import_statement():
+    with app.app_context():
+        file_path = input("Statement file (CSV/PDF): ").strip()
+        if file_path.lower().endswith(".pdf"):
+            batches = [parser.parse_pdf(file_path)]
+        else:
+            batches = parser.iter_csv(file_path, chunksize=app.config["STATEMENT_CHUNK_SIZE"])
+
+        saved_count = 0
+        errors = []
+        for batch in batches:
+            saved_count += bulk_insert_transactions(
+                batch, batch_size=app.config["INSERT_BATCH_SIZE"], errors=errors
+            )
+
+        print(f"Imported {saved_count} transactions.")
+        for error in errors:
+            print(error)
+
 def show_summary():
     with app.app_context():
-        transactions = Transaction.query.all()
-        income = sum(t.amount for t in transactions if t.type == "income")
-        expense = sum(t.amount for t in transactions if t.type == "expense")
-        print(f"\nIncome: ₹{income:.2f}")
-        print(f"Expense: ₹{expense:.2f}")
-        print(f"Balance: ₹{income - expense:.2f}\n")
+        summary = balance_summary()
+        print(f"\nIncome: ₹{summary['income']:.2f}")
+        print(f"Expense: ₹{summary['expense']:.2f}")
+        print(f"Balance: ₹{summary['balance']:.2f}\n")
 
 if __name__ == "__main__":
     with app.app_context():
-        db.create_all()  # ✅ Only creates tables if they don't exist
+        upgrade_schema()  # ✅ Creates missing tables, columns and indexes
 
     while True:
-        print("\n1. Add Transaction\n2. View Summary\n3. Exit")
+        print("\n1. Add Transaction\n2. View Summary\n3. Import Statement\n4. Exit")
         choice = input("Choose an option: ")
         if choice == "1":
             add_transaction()
         elif choice == "2":
             show_summary()
         elif choice == "3":
+            import_statement()
+        elif choice == "4":
             break
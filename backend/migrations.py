@@ -0,0 +1,34 @@
+from sqlalchemy import inspect, text
+from storage import db
+from models import Transaction
+from rollups import ensure_rollups
+
+
+def upgrade_schema():
+    """Bring an existing database up to date with the models.
+
+    create_all() only adds missing tables, so columns and indexes added to
+    existing tables are applied here. Rollups are backfilled when the table
+    is empty but transactions exist. Safe to run on every startup.
+    """
+    db.create_all()
+
+    columns = {column['name'] for column in inspect(db.engine).get_columns('transaction')}
+    if 'user_id' not in columns:
+        with db.engine.begin() as conn:
+            conn.execute(text('ALTER TABLE "transaction" ADD COLUMN user_id INTEGER REFERENCES user (id)'))
+
+    for index in Transaction.__table__.indexes:
+        index.create(bind=db.engine, checkfirst=True)
+
+    ensure_rollups()
+
+
+if __name__ == "__main__":
+    from api import create_app
+
+    app = create_app()
+
+    with app.app_context():
+        upgrade_schema()
+        print("Database schema is up to date.")
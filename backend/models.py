@@ -1,4 +1,5 @@
 # models.py
+import json
 from datetime import datetime
 from storage import db  # ✅ no circular import
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -7,6 +8,7 @@ from storage import db
 
 class Transaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))  # None for transactions added without login
     amount = db.Column(db.Float, nullable=False)
     category = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(200))
@@ -28,6 +30,25 @@ class Transaction(db.Model):
         "timestamp": self.timestamp.isoformat()  # ✅ ensures T format
     }
 
+# Per-user lookups: history ranges, newest-first pages and type/category filters
+db.Index('ix_transaction_user_timestamp', Transaction.user_id, Transaction.timestamp)
+db.Index('ix_transaction_user_timestamp_desc', Transaction.user_id, Transaction.timestamp.desc())
+db.Index('ix_transaction_user_type_category', Transaction.user_id, Transaction.type, Transaction.category)
+
+class MonthlyRollup(db.Model):
+    """Running amount totals per user, month, type and category"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer)  # None for transactions without an owner
+    month = db.Column(db.String(7), nullable=False)  # YYYY-MM
+    type = db.Column(db.String(10))
+    category = db.Column(db.String(100))
+    total = db.Column(db.Float, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_monthly_rollup_key', 'user_id', 'month', 'type', 'category'),
+    )
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(100), unique=True, nullable=False)
@@ -37,4 +58,36 @@ class User(db.Model):
         self.password_hash = generate_password_hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)    
+        return check_password_hash(self.password_hash, password)
+
+class ImportJob(db.Model):
+    id = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    filename = db.Column(db.String(255))
+    file_path = db.Column(db.String(500))
+    status = db.Column(db.String(20), default='queued')  # queued, running, completed or failed
+    rows_parsed = db.Column(db.Integer, default=0)
+    saved_count = db.Column(db.Integer, default=0)
+    duplicate_count = db.Column(db.Integer, default=0)
+    error_count = db.Column(db.Integer, default=0)
+    errors = db.Column(db.Text, default='[]')  # JSON list of error messages
+    message = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "filename": self.filename,
+            "rows_parsed": self.rows_parsed,
+            "saved_count": self.saved_count,
+            "duplicate_count": self.duplicate_count,
+            "error_count": self.error_count,
+            "errors": json.loads(self.errors or '[]')[:5],
+            "message": self.message,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,61 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+from models import Transaction
+
+
+def encode_cursor(transaction):
+    """Opaque token pointing just past the given transaction"""
+    payload = json.dumps([transaction.timestamp.isoformat(), transaction.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor into (timestamp, id), raising ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, transaction_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp), int(transaction_id)
+    except Exception as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def int_arg(args, name, default, minimum):
+    """Integer query arg, raising ValueError if malformed or below `minimum`"""
+    value = args.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        number = None
+    if number is None or number < minimum:
+        raise ValueError(f"'{name}' must be an integer >= {minimum}")
+    return number
+
+
+def paginate_newest_first(query, limit, cursor=None, offset=0):
+    """Fetch one page ordered by (timestamp, id) descending.
+
+    With a cursor the page starts right after the cursor's row, so it is an
+    index seek no matter how deep the page is. Returns (transactions,
+    next_cursor); next_cursor is None on the last page.
+    """
+    if limit < 1:
+        raise ValueError("'limit' must be an integer >= 1")
+    if cursor:
+        timestamp, transaction_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Transaction.timestamp < timestamp,
+            and_(Transaction.timestamp == timestamp, Transaction.id < transaction_id)
+        ))
+
+    # Fetch one extra row to know whether another page follows
+    transactions = query.order_by(Transaction.timestamp.desc(), Transaction.id.desc()) \
+        .offset(offset) \
+        .limit(limit + 1) \
+        .all()
+
+    next_cursor = encode_cursor(transactions[limit - 1]) if len(transactions) > limit else None
+    return transactions[:limit], next_cursor
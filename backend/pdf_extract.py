@@ -0,0 +1,76 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+
+logger = logging.getLogger(__name__)
+
+PAGES_PER_TASK = 8  # pages extracted by one worker call
+MIN_PARALLEL_PAGES = 16  # smaller PDFs are extracted in-process
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Shared process pool for page extraction, created on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn avoids forking a multithreaded web worker
+            _executor = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _executor
+
+
+def _discard_executor(executor):
+    """Drop a broken pool so the next get_executor() starts a fresh one"""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False)
+
+
+def extract_page_range(file_path, start, stop):
+    """Extract the text of pages [start, stop) from a PDF"""
+    import pdfplumber  # heavy; only loaded by processes that parse PDFs
+
+    with pdfplumber.open(file_path) as pdf:
+        return [page.extract_text() or '' for page in pdf.pages[start:stop]]
+
+
+def iter_page_texts(file_path):
+    """Yield the text of each page in order, extracting page ranges in parallel"""
+    import pdfplumber
+
+    with pdfplumber.open(file_path) as pdf:
+        total_pages = len(pdf.pages)
+        if total_pages < MIN_PARALLEL_PAGES:
+            for page in pdf.pages:
+                yield page.extract_text() or ''
+            return
+
+    # A worker that dies (killed, out of memory) breaks the whole pool; retry
+    # the remaining pages once on a new pool, then extract them in-process
+    next_page = 0
+    for _ in range(2):
+        executor = get_executor()
+        starts = range(next_page, total_pages, PAGES_PER_TASK)
+        stops = [min(start + PAGES_PER_TASK, total_pages) for start in starts]
+        try:
+            # map() yields each range as soon as it and the ones before it are done
+            for texts in executor.map(extract_page_range, repeat(file_path), starts, stops):
+                next_page += len(texts)
+                yield from texts
+            return
+        except BrokenProcessPool:
+            logger.warning(f"PDF extraction pool broke at page {next_page + 1} of {file_path}")
+            _discard_executor(executor)
+
+    yield from extract_page_range(file_path, next_page, total_pages)
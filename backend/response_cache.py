@@ -0,0 +1,106 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, make_response, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+DEFAULT_MAXSIZE = 256
+DEFAULT_TTL = 60  # seconds; also bounds staleness across separate worker processes
+
+_data_version = 0
+_version_lock = threading.Lock()
+
+
+def data_version():
+    return _data_version
+
+
+def bump_data_version():
+    """Invalidate cached responses after transactions are written"""
+    global _data_version
+    with _version_lock:
+        _data_version += 1
+
+
+class ResponseCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds"""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+cache = ResponseCache()
+
+
+def _request_identity():
+    """JWT identity if the request carries a valid token, else None"""
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+
+def cached_response(view):
+    """Cache a read-only JSON view per endpoint, query args, user and data version.
+
+    Responses carry an ETag of the body alone, so a client revalidating gets
+    304 whenever the body is unchanged, even after writes that bump the data
+    version; the version only decides when the cached entry is recomputed.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = data_version()
+        key = (
+            request.endpoint,
+            tuple(sorted(request.args.items(multi=True))),
+            _request_identity(),
+            version
+        )
+
+        entry = cache.get(key)
+        if entry is None:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            body = response.get_data()
+            etag = hashlib.sha1(body).hexdigest()
+            entry = (body, response.mimetype, etag)
+            cache.set(key, entry)
+
+        body, mimetype, etag = entry
+        response = current_app.response_class(body, mimetype=mimetype)
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+    return wrapper
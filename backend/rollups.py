@@ -0,0 +1,83 @@
+from sqlalchemy import and_, delete, func, insert, select, update
+from storage import db
+from models import MonthlyRollup, Transaction
+
+
+def rollup_deltas(transactions):
+    """Sum and count per (user_id, month, type, category) for transaction dicts"""
+    deltas = {}
+    for trans_data in transactions:
+        key = (
+            trans_data.get('user_id'),
+            trans_data['timestamp'].strftime('%Y-%m'),
+            trans_data['type'],
+            trans_data['category']
+        )
+        total, count = deltas.get(key, (0.0, 0))
+        deltas[key] = (total + trans_data['amount'], count + 1)
+    return deltas
+
+
+def add_to_rollups(transactions):
+    """Fold new transactions into the rollup table.
+
+    Runs in the caller's transaction so the rollups commit (or roll back)
+    together with the rows they describe.
+    """
+    table = MonthlyRollup.__table__
+
+    for (user_id, month, type_, category), (total, count) in rollup_deltas(transactions).items():
+        key = and_(
+            table.c.user_id.is_not_distinct_from(user_id),
+            table.c.month == month,
+            table.c.type.is_not_distinct_from(type_),
+            table.c.category.is_not_distinct_from(category)
+        )
+        result = db.session.execute(
+            update(table).where(key).values(total=table.c.total + total, count=table.c.count + count)
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(table).values(
+                user_id=user_id, month=month, type=type_, category=category, total=total, count=count
+            ))
+
+
+def rebuild_rollups():
+    """Recompute the whole rollup table from Transaction rows"""
+    table = MonthlyRollup.__table__
+    month = func.strftime('%Y-%m', Transaction.timestamp)
+
+    totals = select(
+        Transaction.user_id,
+        month,
+        Transaction.type,
+        Transaction.category,
+        func.sum(Transaction.amount),
+        func.count(Transaction.id)
+    ).where(Transaction.timestamp.is_not(None)) \
+     .group_by(Transaction.user_id, month, Transaction.type, Transaction.category)
+
+    db.session.execute(delete(table))
+    db.session.execute(insert(table).from_select(
+        ['user_id', 'month', 'type', 'category', 'total', 'count'], totals
+    ))
+    db.session.commit()
+
+
+def ensure_rollups():
+    """Build the rollup table if it is empty but transactions exist"""
+    if db.session.query(MonthlyRollup.id).first() is None \
+            and db.session.query(Transaction.id).first() is not None:
+        rebuild_rollups()
+
+
+if __name__ == "__main__":
+    from api import create_app
+    from migrations import upgrade_schema
+
+    app = create_app()
+
+    with app.app_context():
+        upgrade_schema()
+        rebuild_rollups()
+        print("Rollups rebuilt.")
@@ -0,0 +1,203 @@
+import importlib.util
+import logging
+import os
+import threading
+import uuid
+from functools import lru_cache
+
+from storage import db
+from models import Transaction
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FOLDER = 'snapshots'
+
+_refresh_lock = threading.Lock()
+_stale = set()  # users whose snapshot file could not be removed after a failed refresh
+
+
+@lru_cache(maxsize=None)
+def available():
+    """True when pyarrow is installed and snapshots can be used.
+
+    pyarrow (and numpy with it) is optional and only imported by the
+    functions below, so importing this module stays cheap; without it
+    analytics fall back to SQL rollups.
+    """
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def snapshot_path(user_id):
+    return os.path.join(SNAPSHOT_FOLDER, f"user_{user_id}.arrow")
+
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('id', pa.int64()),
+        ('amount', pa.float64()),
+        ('category', pa.string()),
+        ('type', pa.string()),
+        ('timestamp', pa.timestamp('us')),
+        ('month', pa.string())
+    ])
+
+
+def load_snapshot(user_id):
+    """Memory-map the user's Arrow snapshot, or None if it has not been built"""
+    path = snapshot_path(user_id)
+    if str(user_id) in _stale or not os.path.exists(path):
+        return None
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def _read_snapshot(user_id):
+    """Read the snapshot into memory; unlike load_snapshot it keeps no mapping
+    of the file open, which would make os.replace fail on Windows"""
+    path = snapshot_path(user_id)
+    if str(user_id) in _stale or not os.path.exists(path):
+        return None
+    import pyarrow as pa
+
+    with pa.OSFile(path, 'rb') as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def invalidate_snapshot(user_id):
+    """Stop serving the user's snapshot; the next refresh rebuilds it from scratch"""
+    try:
+        os.remove(snapshot_path(user_id))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        # Still mapped by a reader (Windows); skip it until a rebuild replaces it
+        logger.warning(f"Could not remove snapshot for user {user_id}: {e}")
+        _stale.add(str(user_id))
+
+
+def refresh_snapshot(user_id):
+    """Append the user's transactions added since the last refresh.
+
+    Only rows with an id above the snapshot's highest id are read from the
+    database. The file is rewritten next to the old one and swapped in with
+    os.replace, so readers never see a partial snapshot. If the refresh
+    fails, the snapshot is invalidated rather than left behind stale.
+    """
+    with _refresh_lock:
+        try:
+            return _refresh_snapshot(user_id)
+        except Exception:
+            invalidate_snapshot(user_id)
+            raise
+
+
+def _refresh_snapshot(user_id):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    table = _read_snapshot(user_id)
+    last_id = pc.max(table['id']).as_py() if table is not None and table.num_rows else 0
+
+    rows = db.session.query(
+        Transaction.id,
+        Transaction.amount,
+        Transaction.category,
+        Transaction.type,
+        Transaction.timestamp
+    ).filter(
+        Transaction.user_id == user_id,
+        Transaction.id > last_id
+    ).order_by(Transaction.id).all()
+
+    if table is not None and not rows:
+        return table
+
+    ids, amounts, categories, types, timestamps = zip(*rows) if rows else ([], [], [], [], [])
+    timestamp_array = pa.array(timestamps, pa.timestamp('us'))
+    new_rows = pa.table([
+        pa.array(ids, pa.int64()),
+        pa.array(amounts, pa.float64()),
+        pa.array(categories, pa.string()),
+        pa.array(types, pa.string()),
+        timestamp_array,
+        pc.strftime(timestamp_array, format='%Y-%m')
+    ], schema=_schema())
+    table = pa.concat_tables([table, new_rows]) if table is not None else new_rows
+
+    os.makedirs(SNAPSHOT_FOLDER, exist_ok=True)
+    path = snapshot_path(user_id)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    _stale.discard(str(user_id))
+
+    logger.info(f"Snapshot for user {user_id} refreshed: {len(rows)} new rows")
+    return load_snapshot(user_id)
+
+
+def user_snapshot(user_id):
+    """The user's snapshot, built on first use.
+
+    None when pyarrow is missing or the snapshot cannot be built; callers
+    then fall back to SQL.
+    """
+    if not available():
+        return None
+    table = load_snapshot(user_id)
+    if table is None:
+        try:
+            table = refresh_snapshot(user_id)
+        except Exception as e:
+            logger.warning(f"Snapshot build failed for user {user_id}: {e}")
+    return table
+
+
+# -------------------------
+# Vectorized analytics over a snapshot table
+# -------------------------
+def category_stats(table):
+    """{category: {'total', 'count'}} over all rows"""
+    grouped = table.group_by('category').aggregate([('amount', 'sum'), ('amount', 'count')])
+    return {
+        row['category']: {'total': row['amount_sum'], 'count': row['amount_count']}
+        for row in grouped.to_pylist()
+    }
+
+
+def category_totals(table, txn_type=None, month=None):
+    """{category: total}, optionally limited to one type and/or one YYYY-MM month"""
+    import pyarrow.compute as pc
+
+    if txn_type is not None:
+        table = table.filter(pc.equal(table['type'], txn_type))
+    if month is not None:
+        table = table.filter(pc.equal(table['month'], month))
+    grouped = table.group_by('category').aggregate([('amount', 'sum')])
+    return {row['category']: row['amount_sum'] for row in grouped.to_pylist()}
+
+
+def monthly_totals(table, start=None, end=None):
+    """{month: {type: total}}, optionally within inclusive YYYY-MM bounds"""
+    import pyarrow.compute as pc
+
+    if start is not None:
+        table = table.filter(pc.greater_equal(table['month'], start))
+    if end is not None:
+        table = table.filter(pc.less_equal(table['month'], end))
+
+    grouped = table.group_by(['month', 'type']).aggregate([('amount', 'sum')])
+    totals = {}
+    for row in grouped.to_pylist():
+        if row['month'] is None:
+            continue
+        totals.setdefault(row['month'], {})[row['type']] = row['amount_sum']
+    return totals
@@ -0,0 +1,57 @@
+import re
+from collections import namedtuple
+
+# A bank statement line format. `regex` must define the named groups
+# date, description and amount; an optional `indicator` group holds the
+# dr/cr marker used to tell income from expense.
+LineGrammar = namedtuple('LineGrammar', ['name', 'regex'])
+
+REQUIRED_GROUPS = {'date', 'description', 'amount'}
+
+_grammars = []
+
+
+def register_grammar(name, pattern, flags=re.IGNORECASE, first=False):
+    """Compile and register a line grammar.
+
+    Grammars are tried in registration order; pass first=True to give a
+    bank-specific grammar priority over the generic ones.
+    """
+    regex = re.compile(pattern, flags)
+    missing = REQUIRED_GROUPS - set(regex.groupindex)
+    if missing:
+        raise ValueError(f"Grammar '{name}' is missing groups: {', '.join(sorted(missing))}")
+
+    grammar = LineGrammar(name, regex)
+    if first:
+        _grammars.insert(0, grammar)
+    else:
+        _grammars.append(grammar)
+    return grammar
+
+
+def get_grammars():
+    """Registered grammars in priority order"""
+    return list(_grammars)
+
+
+def match_line(line, grammars=None):
+    """Return (grammar, match) for the first grammar matching the line, or (None, None)"""
+    for grammar in _grammars if grammars is None else grammars:
+        match = grammar.regex.search(line)
+        if match:
+            return grammar, match
+    return None, None
+
+
+# Generic formats
+register_grammar(
+    'numeric_date_dr_cr',
+    r'(?P<date>\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\s+(?P<description>.+?)\s+'
+    r'(?P<amount>\d+[,.]?\d*\.?\d{2})\s*(?P<indicator>dr|cr|debit|credit)'
+)
+register_grammar(
+    'month_name_date',
+    r'(?P<date>\d{1,2}\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{4})\s+'
+    r'(?P<description>.+?)\s+(?P<amount>\d+[,.]?\d*\.?\d{2})'
+)
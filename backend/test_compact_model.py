@@ -0,0 +1,91 @@
+"""CompactModel must predict exactly what the exported sklearn Pipeline predicts.
+
+    python -m pytest backend
+"""
+import os
+import random
+
+import joblib
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+from sklearn.utils import murmurhash3_32 as sklearn_murmurhash3_32
+
+from compact_model import CompactModel, export_model, murmurhash3_32
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+TRAINING_DATA = os.path.join(BACKEND_DIR, 'transaction_training_data.csv')
+
+
+@pytest.fixture(scope='module')
+def training():
+    df = pd.read_csv(TRAINING_DATA).dropna(subset=['description', 'category'])
+    return df['description'].astype(str).tolist(), df['category'].astype(str).tolist()
+
+
+@pytest.fixture(scope='module')
+def descriptions(training):
+    """Training descriptions plus noisy variants with unseen tokens, digits and non-ASCII"""
+    rng = random.Random(0)
+    words = [word for text in training[0] for word in text.split()]
+    extra = ['UPI/123456/', 'ÇAFÉ', 'zzz', '42', '', '  ', 'naïve', 'Ölçek', '€', 'a-b_c', 'x']
+    noisy = [
+        ' '.join(rng.choice(words + extra) for _ in range(rng.randrange(0, 8)))
+        for _ in range(5000)
+    ]
+    return training[0] + noisy + ['', '!!!', 'unseenword']
+
+
+PIPELINES = {
+    'tfidf default': lambda: TfidfVectorizer(),
+    'tfidf ngram sublinear': lambda: TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True),
+    'tfidf bigrams only l1': lambda: TfidfVectorizer(ngram_range=(2, 3), norm='l1'),
+    'tfidf no idf binary': lambda: TfidfVectorizer(use_idf=False, binary=True, norm=None),
+    'tfidf case sensitive': lambda: TfidfVectorizer(lowercase=False, token_pattern=r'(?u)\b\w+\b'),
+    'hashing': lambda: HashingVectorizer(n_features=2 ** 18, alternate_sign=False),
+    'hashing ngram small': lambda: HashingVectorizer(n_features=2 ** 10, alternate_sign=False, ngram_range=(1, 2)),
+}
+
+
+@pytest.mark.parametrize('name', PIPELINES)
+def test_predictions_match_pipeline(name, training, descriptions, tmp_path):
+    pipeline = Pipeline([('vectorizer', PIPELINES[name]()), ('clf', MultinomialNB())])
+    pipeline.fit(*training)
+
+    export_model(pipeline, tmp_path)
+    compact = CompactModel.load(tmp_path)
+
+    expected = pipeline.predict(descriptions)
+    assert list(compact.predict(descriptions)) == list(expected)
+    # One at a time too, as the API's single-row path calls it
+    for description in descriptions[:200]:
+        assert compact.predict([description])[0] == pipeline.predict([description])[0]
+
+
+def test_empty_batch(training, tmp_path):
+    pipeline = Pipeline([('tfidf', TfidfVectorizer()), ('clf', MultinomialNB())]).fit(*training)
+    export_model(pipeline, tmp_path)
+    assert len(CompactModel.load(tmp_path).predict([])) == 0
+
+
+def test_committed_artifact_matches_committed_pickle(descriptions):
+    pipeline = joblib.load(os.path.join(BACKEND_DIR, 'transaction_classifier.pkl'))
+    compact = CompactModel.load(os.path.join(BACKEND_DIR, 'transaction_classifier'))
+    assert list(compact.predict(descriptions)) == list(pipeline.predict(descriptions))
+
+
+def test_unsupported_pipelines_are_rejected(training, tmp_path):
+    pipeline = Pipeline([('tfidf', TfidfVectorizer(analyzer='char')), ('clf', MultinomialNB())]).fit(*training)
+    with pytest.raises(ValueError):
+        export_model(pipeline, tmp_path)
+
+
+def test_murmurhash_matches_sklearn():
+    rng = random.Random(0)
+    alphabet = 'abcxyz019 _-éßж€😀'
+    tokens = ['', 'a', 'ab', 'abc', 'abcd', 'abcde', 'salary', 'uber trip']
+    tokens += [''.join(rng.choice(alphabet) for _ in range(rng.randrange(1, 20))) for _ in range(20000)]
+    for token in tokens:
+        assert murmurhash3_32(token) == sklearn_murmurhash3_32(token, positive=False), token
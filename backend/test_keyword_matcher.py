@@ -0,0 +1,74 @@
+"""KeywordMatcher must agree with checking each category's keywords in order.
+
+    python -m pytest backend
+"""
+import random
+
+import pytest
+
+from keyword_matcher import KeywordMatcher
+from utils import CATEGORY_KEYWORDS, categorize
+
+# Keywords that are prefixes, suffixes and substrings of one another
+OVERLAPPING = {
+    'she': ['she', 'ushers'],
+    'he': ['he', 'hers'],
+    'his': ['his'],
+    'rent': ['rent', 'current'],
+    'parent': ['parent', 'a'],
+}
+
+
+def parser_mapping():
+    from api import BankStatementParser
+
+    return BankStatementParser().category_mapping
+
+
+def naive_matches(mapping, text):
+    text = text.lower()
+    return [category for category, keywords in mapping.items() if any(keyword in text for keyword in keywords)]
+
+
+def naive_first_match(mapping, text, default=None):
+    matches = naive_matches(mapping, text)
+    return matches[0] if matches else default
+
+
+def random_texts(mapping, count, seed=0):
+    """Random strings over the keywords' letters, often with keywords spliced in"""
+    rng = random.Random(seed)
+    keywords = [keyword for words in mapping.values() for keyword in words]
+    alphabet = sorted({char for keyword in keywords for char in keyword}) + list(' 0/-XYZ')
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randrange(1, 6)):
+            if rng.random() < 0.4:
+                keyword = rng.choice(keywords)
+                parts.append(keyword.upper() if rng.random() < 0.3 else keyword)
+            else:
+                parts.append(''.join(rng.choice(alphabet) for _ in range(rng.randrange(0, 12))))
+        yield ''.join(parts)
+
+
+@pytest.mark.parametrize('mapping', [CATEGORY_KEYWORDS, OVERLAPPING, parser_mapping()],
+                         ids=['utils', 'overlapping', 'parser'])
+def test_matches_naive_keyword_loops(mapping):
+    matcher = KeywordMatcher(mapping)
+    for text in random_texts(mapping, 50000):
+        assert matcher.first_match(text, default='none') == naive_first_match(mapping, text, 'none'), text
+        assert matcher.matches(text) == naive_matches(mapping, text), text
+
+
+def test_categorize_keeps_priority_order():
+    assert categorize('Monthly SALARY and rent') == 'Salary'
+    assert categorize('rent for the restaurant') == 'Rent'
+    assert categorize('Netflix movie night food') == 'Food'
+    assert categorize('Netflix') == 'Entertainment'
+    assert categorize('atm withdrawal') == 'Other'
+
+
+def test_empty_inputs():
+    assert KeywordMatcher({}).first_match('anything', default='other') == 'other'
+    assert KeywordMatcher({}).matches('anything') == []
+    assert KeywordMatcher(OVERLAPPING).first_match('', default='other') == 'other'
@@ -1,32 +1,347 @@
+"""Train the transaction classifier.
+
+    python train_model.py                  # full refit on transaction_training_data.csv
+    python train_model.py --incremental    # fold newly labeled transactions into the last checkpoint
+    python train_model.py --export         # write the compact artifact for transaction_classifier.pkl
+
+Both modes also export the model as memory-mappable NumPy arrays to
+transaction_classifier/ (see compact_model), which the API serves without
+importing scikit-learn.
+
+Incremental mode uses a HashingVectorizer, so no vocabulary has to be held
+in memory, and MultinomialNB.partial_fit. Rows are streamed from the
+database in batches, starting after the last transaction id the previous
+checkpoint saw. Only rows labeled with a category the model already knows
+(the training data's categories) are learned; stored transactions also
+carry keyword-fallback labels from other taxonomies ('Food', 'other', ...)
+that would otherwise become classes of their own. --allow-new-classes
+admits them. Each run writes a versioned checkpoint plus a JSON report
+to checkpoints/ and then atomically replaces transaction_classifier.pkl,
+which running API workers hot-reload.
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.metrics import classification_report
+from sklearn.model_selection import train_test_split
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import Pipeline
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
-import joblib
 
-# Load the dataset
-df = pd.read_csv("transaction_training_data.csv")
+from compact_model import export_model
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+TRAINING_DATA = os.path.join(BACKEND_DIR, 'transaction_training_data.csv')
+MODEL_PATH = os.path.join(BACKEND_DIR, 'transaction_classifier.pkl')
+ARTIFACT_DIR = os.path.join(BACKEND_DIR, 'transaction_classifier')
+CHECKPOINT_DIR = os.path.join(BACKEND_DIR, 'checkpoints')
+
+BATCH_SIZE = 10000  # labeled rows per partial_fit call
+HASH_FEATURES = 2 ** 18  # keeps feature_count_ at 2MB per category
+
+
+def publish(model, path=MODEL_PATH):
+    """Write the model next to `path` and swap it in, so readers never see a partial file"""
+    tmp_path = f"{path}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def export_compact(model):
+    """Export the published model for the API's NumPy inference path"""
+    manifest = export_model(model, ARTIFACT_DIR)
+    print(f"✅ Compact model exported to {os.path.basename(ARTIFACT_DIR)}/ ({manifest['export_id']})")
+
+
+# -------------------------
+# Full refit
+# -------------------------
+def train_full():
+    # Load the dataset
+    df = pd.read_csv(TRAINING_DATA)
+
+    # Split data
+    X = df['description']
+    y = df['category']
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    # Create a text classification pipeline
+    model = Pipeline([
+        ('tfidf', TfidfVectorizer()),
+        ('clf', MultinomialNB())
+    ])
+
+    # Train the model
+    model.fit(X_train, y_train)
+
+    # Evaluate
+    y_pred = model.predict(X_test)
+    print(classification_report(y_test, y_pred))
+
+    # Save the model to a file
+    publish(model)
+    print("✅ Model saved to transaction_classifier.pkl")
+    export_compact(model)
+
+
+# -------------------------
+# Incremental training
+# -------------------------
+def new_incremental_model():
+    return Pipeline([
+        ('hashing', HashingVectorizer(n_features=HASH_FEATURES, alternate_sign=False)),
+        ('clf', MultinomialNB())
+    ])
+
+
+def latest_checkpoint():
+    """(version, metadata) of the newest checkpoint, or (0, None)"""
+    versions = []
+    for path in glob.glob(os.path.join(CHECKPOINT_DIR, 'classifier-v*.json')):
+        match = re.search(r'classifier-v(\d+)\.json$', path)
+        if match:
+            versions.append(int(match.group(1)))
+    if not versions:
+        return 0, None
+    version = max(versions)
+    with open(checkpoint_path(version, 'json')) as f:
+        return version, json.load(f)
+
+
+def checkpoint_path(version, extension):
+    return os.path.join(CHECKPOINT_DIR, f"classifier-v{version}.{extension}")
+
+
+def add_classes(clf, labels):
+    """Grow a fitted MultinomialNB so it can learn categories it has not seen.
+
+    New classes start with zero counts; the next partial_fit call that
+    contains them fills in their counts and recomputes the log probabilities.
+    """
+    new = sorted(set(labels) - set(clf.classes_))
+    if not new:
+        return
+    classes = np.concatenate([clf.classes_, np.array(new)])
+    order = np.argsort(classes, kind='stable')  # partial_fit expects sorted classes_
+    clf.classes_ = classes[order]
+    clf.class_count_ = np.concatenate([clf.class_count_, np.zeros(len(new))])[order]
+    clf.feature_count_ = np.vstack([clf.feature_count_, np.zeros((len(new), clf.feature_count_.shape[1]))])[order]
+
+
+class ProgressiveEvaluation:
+    """Test-then-train scores: each batch is predicted before the model learns it.
+
+    Only a confusion count per (true, predicted) pair is kept, so memory does
+    not grow with the number of rows.
+    """
+
+    def __init__(self):
+        self.confusion = {}
+
+    def add(self, y_true, y_pred):
+        for true, pred in zip(y_true, y_pred):
+            self.confusion[(true, pred)] = self.confusion.get((true, pred), 0) + 1
+
+    def report(self):
+        total = sum(self.confusion.values())
+        correct = sum(n for (true, pred), n in self.confusion.items() if true == pred)
+        labels = sorted({label for pair in self.confusion for label in pair})
+        per_category = {}
+        for label in labels:
+            tp = self.confusion.get((label, label), 0)
+            support = sum(n for (true, _), n in self.confusion.items() if true == label)
+            predicted = sum(n for (_, pred), n in self.confusion.items() if pred == label)
+            precision = tp / predicted if predicted else 0.0
+            recall = tp / support if support else 0.0
+            f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            per_category[label] = {'precision': precision, 'recall': recall, 'f1': f1, 'support': support}
+        return {
+            'rows': total,
+            'accuracy': correct / total if total else None,
+            'categories': per_category,
+        }
+
+
+def csv_batches(batch_size):
+    """(descriptions, categories, None) batches from the bundled training data"""
+    for df in pd.read_csv(TRAINING_DATA, chunksize=batch_size):
+        df = df.dropna(subset=['description', 'category'])
+        yield df['description'].astype(str).tolist(), df['category'].astype(str).tolist(), None
+
+
+def seed_labels():
+    """Categories of the bundled training data"""
+    return set(pd.read_csv(TRAINING_DATA, usecols=['category'])['category'].dropna().astype(str))
+
+
+def transaction_batches(after_id, batch_size, labels=None, scan=None):
+    """(descriptions, categories, last id) batches of labeled transactions after `after_id`.
+
+    With `labels`, rows whose category is not in it are skipped. `scan`, if
+    given, receives the number of skipped rows and the last id read.
+    """
+    from models import Transaction
+
+    scan = {} if scan is None else scan
+    scan.update(skipped=0, last_id=after_id)
+
+    rows = (
+        Transaction.query
+        .with_entities(Transaction.id, Transaction.description, Transaction.category)
+        .filter(Transaction.id > after_id)
+        .filter(Transaction.description.isnot(None), Transaction.description != '')
+        .filter(Transaction.category.isnot(None), Transaction.category != '')
+        .order_by(Transaction.id)
+        .yield_per(batch_size)
+    )
+
+    descriptions, categories, last_id = [], [], after_id
+    for row_id, description, category in rows:
+        scan['last_id'] = row_id
+        if labels is not None and category not in labels:
+            scan['skipped'] += 1
+            continue
+        descriptions.append(description)
+        categories.append(category)
+        last_id = row_id
+        if len(descriptions) == batch_size:
+            yield descriptions, categories, last_id
+            descriptions, categories = [], []
+    if descriptions:
+        yield descriptions, categories, last_id
+
+
+def fit_batches(model, batches, evaluation):
+    """partial_fit each batch, scoring it first; returns (rows, last transaction id)"""
+    clf = model.named_steps['clf']
+    vectorizer = model.named_steps['hashing']
+    rows, last_id = 0, None
+
+    for descriptions, categories, batch_last_id in batches:
+        X = vectorizer.transform(descriptions)
+        if hasattr(clf, 'classes_'):
+            known = np.isin(categories, clf.classes_)
+            if known.any():
+                evaluation.add(np.asarray(categories)[known], clf.predict(X[known]))
+            add_classes(clf, categories)
+            clf.partial_fit(X, categories)
+        else:
+            clf.partial_fit(X, categories, classes=np.unique(categories))
+
+        rows += len(descriptions)
+        if batch_last_id is not None:
+            last_id = batch_last_id
+        print(f"  {rows} rows folded in")
+
+    return rows, last_id
+
+
+def train_incremental(batch_size=BATCH_SIZE, rebuild=False, publish_model=True, allow_new_classes=False):
+    from api import create_app
+    from migrations import upgrade_schema
+
+    started = time.perf_counter()
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+
+    version, meta = (0, None) if rebuild else latest_checkpoint()
+    evaluation = ProgressiveEvaluation()
+    seed_rows = 0
+
+    if meta is None:
+        # First checkpoint: start from the bundled training data
+        model = new_incremental_model()
+        after_id = 0
+        total_rows = 0
+        seed_rows, _ = fit_batches(model, csv_batches(batch_size), evaluation)
+        evaluation = ProgressiveEvaluation()  # score only the stored transactions
+    else:
+        model = joblib.load(checkpoint_path(version, 'pkl'))
+        after_id = meta['last_transaction_id']
+        total_rows = meta['total_rows']
+
+    # Labels the model may learn; a checkpoint's classes include the seed labels
+    labels = None if allow_new_classes else seed_labels() | set(meta['classes'] if meta else [])
+    scan = {}
+
+    app = create_app()
+    with app.app_context():
+        upgrade_schema()
+        rows, _ = fit_batches(model, transaction_batches(after_id, batch_size, labels, scan), evaluation)
+    if scan['skipped']:
+        print(f"  {scan['skipped']} rows skipped: category not in the label set (see --allow-new-classes)")
+
+    if meta is not None and rows == 0 and not scan['skipped']:
+        print(f"No new labeled transactions since checkpoint v{version}; nothing to do.")
+        return None
+
+    new_version = version + 1
+    metadata = {
+        'version': new_version,
+        'parent_version': version or None,
+        'created_at': datetime.now().isoformat(),
+        'last_transaction_id': scan['last_id'],
+        'rows': rows,
+        'skipped_rows': scan['skipped'],
+        'new_classes_allowed': allow_new_classes,
+        'seed_rows': seed_rows,
+        'total_rows': total_rows + seed_rows + rows,
+        'hash_features': HASH_FEATURES,
+        'classes': [str(label) for label in model.named_steps['clf'].classes_],
+        'duration_seconds': time.perf_counter() - started,
+        'evaluation': evaluation.report(),
+    }
+
+    publish(model, checkpoint_path(new_version, 'pkl'))
+    with open(checkpoint_path(new_version, 'json'), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    print(json.dumps(metadata['evaluation'], indent=2))
+    print(f"✅ Checkpoint v{new_version} saved ({rows} new rows, {metadata['total_rows']} total)")
+
+    if not (rows or seed_rows):
+        # Only skipped rows were read: the checkpoint moves the scan past them
+        # so the next run does not read them again, but the model is unchanged
+        return metadata
+
+    if publish_model:
+        publish(model)
+        print("✅ Model saved to transaction_classifier.pkl")
+        export_compact(model)
+
+    return metadata
 
-# Split data
-X = df['description']
-y = df['category']
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-# Create a text classification pipeline
-model = Pipeline([
-    ('tfidf', TfidfVectorizer()),
-    ('clf', MultinomialNB())
-])
+def main():
+    arg_parser = argparse.ArgumentParser(description="Train the transaction classifier")
+    arg_parser.add_argument('--incremental', action='store_true',
+                            help='fold newly labeled transactions into the last checkpoint')
+    arg_parser.add_argument('--export', action='store_true',
+                            help='only export transaction_classifier.pkl to the compact format')
+    arg_parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    arg_parser.add_argument('--rebuild', action='store_true',
+                            help='with --incremental, ignore existing checkpoints and start over')
+    arg_parser.add_argument('--no-publish', action='store_true',
+                            help='with --incremental, write the checkpoint only')
+    arg_parser.add_argument('--allow-new-classes', action='store_true',
+                            help='with --incremental, also learn categories outside the training data')
+    args = arg_parser.parse_args()
 
-# Train the model
-model.fit(X_train, y_train)
+    if args.export:
+        export_compact(joblib.load(MODEL_PATH))
+    elif args.incremental:
+        train_incremental(args.batch_size, rebuild=args.rebuild, publish_model=not args.no_publish,
+                          allow_new_classes=args.allow_new_classes)
+    else:
+        train_full()
 
-# Evaluate
-y_pred = model.predict(X_test)
-print(classification_report(y_test, y_pred))
 
-# Save the model to a file
-joblib.dump(model, 'transaction_classifier.pkl')
-print("✅ Model saved to transaction_classifier.pkl")
+if __name__ == "__main__":
+    main()
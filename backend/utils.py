@@ -1,15 +1,18 @@
 
 import os
 
+from keyword_matcher import KeywordMatcher
+
+# Checked in order; the first category with a matching keyword wins
+CATEGORY_KEYWORDS = {
+    "Salary": ["salary"],
+    "Rent": ["rent"],
+    "Food": ["grocery", "food", "restaurant"],
+    "Entertainment": ["netflix", "entertainment", "movie"],
+}
+
+keyword_matcher = KeywordMatcher(CATEGORY_KEYWORDS)
+
 
 def categorize(description: str) -> str:
-    desc = description.lower()
-    if "salary" in desc:
-        return "Salary"
-    if "rent" in desc:
-        return "Rent"
-    if any(w in desc for w in ["grocery", "food", "restaurant"]):
-        return "Food"
-    if any(w in desc for w in ["netflix", "entertainment", "movie"]):
-        return "Entertainment"
-    return "Other"
+    return keyword_matcher.first_match(description, default="Other")